@@ -7,20 +7,32 @@ from pytgcalls.exceptions import NoActiveGroupCall
 import config
 from AnonXMusic import LOGGER, app, userbot
 from AnonXMusic.core.call import Anony
+from AnonXMusic.core.session import session_pool
 from AnonXMusic.misc import sudo
+from AnonXMusic.platforms._httpx import HttpxClient
+from AnonXMusic.platforms._index import track_index
+from AnonXMusic.platforms._ytdlp import ytdlp
 from AnonXMusic.plugins import ALL_MODULES
 from AnonXMusic.utils.database import get_banned_users, get_gbanned
-from AnonXMusic.utils.cookies import fetch_and_store_cookies
+from AnonXMusic.utils.cookies import cookie_refresher, fetch_and_store_cookies
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.progressive import progressive
+from AnonXMusic.utils.stream.warmer import cache_warmer
 from config import BANNED_USERS, COOKIE_URL
 
 
 async def init():
+    # Start the yt-dlp worker pool (and its forkserver) early
+    await ytdlp.start()
+    progressive.recover()
+
     # Ensure cookies are up-to-date if COOKIE_URL is set
     if COOKIE_URL:
         try:
             await fetch_and_store_cookies()
         except Exception as e:
             LOGGER("AnonXMusic").warning(f"Cookie fetch failed: {e}")
+        asyncio.create_task(cookie_refresher())
     else:
         LOGGER("AnonXMusic").info("No COOKIE_URL set, skipping cookie fetch...")
 
@@ -70,6 +82,12 @@ async def init():
     # Register decorators
     await Anony.decorators()
 
+    # Keep downloads/, cache/ and playback/ within the disk budget
+    content_cache.load()
+    track_index.load()
+    asyncio.create_task(content_cache.run())
+    asyncio.create_task(cache_warmer.run())
+
     LOGGER("AnonXMusic").info(
         "\x41\x6e\x6f\x6e\x58\x20\x4d\x75\x73\x69\x63\x20\x42\x6f\x74\x20\x53\x74\x61"
         "\x72\x74\x65\x64\x20\x53\x75\x63\x63\x65\x73\x73\x66\x75\x6c\x6c\x79\x2e\n\n"
@@ -83,6 +101,11 @@ async def init():
     #  Graceful shutdown
     await app.stop()
     await userbot.stop()
+    await ytdlp.stop()
+    await HttpxClient.close_all()
+    await session_pool.close()
+    content_cache.save()
+    track_index.save()
     LOGGER("AnonXMusic").info("Stopping AnonX Music Bot...")
 
 
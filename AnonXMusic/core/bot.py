@@ -1,9 +1,12 @@
+import asyncio
+
 from pyrogram import Client, errors
 from pyrogram.enums import ChatMemberStatus, ParseMode
 
 import config
 
 from ..logging import LOGGER
+from .transfers import transfers
 
 
 class Anony(Client):
@@ -16,9 +19,26 @@ class Anony(Client):
             bot_token=config.BOT_TOKEN,
             in_memory=True,
             parse_mode=ParseMode.HTML,
-            max_concurrent_transmissions=7,
+            # Slots are handed out by priority in `transfers`
+            max_concurrent_transmissions=transfers.total,
         )
 
+    async def save_file(self, *args, **kwargs):
+        async with transfers.slot():
+            return await super().save_file(*args, **kwargs)
+
+    async def get_file(self, *args, **kwargs):
+        # Fixed when the generator starts; it may be closed later from another task
+        cls = transfers.current()
+        await transfers.acquire(cls)
+        holder = asyncio.current_task()
+        try:
+            async for chunk in super().get_file(*args, **kwargs):
+                yield chunk
+        finally:
+            # Also runs on aclose() and GeneratorExit when the consumer stops early
+            transfers.release(cls, holder)
+
     async def start(self):
         await super().start()
         self.id = self.me.id
@@ -33,6 +33,11 @@ from AnonXMusic.utils.exceptions import AssistantErr
 from AnonXMusic.utils.formatters import check_duration, seconds_to_min, speed_converter
 from AnonXMusic.utils.inline.play import stream_markup
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.cancel import cancel_chat
+from AnonXMusic.utils.stream.feed import playlist_feeds
+from AnonXMusic.utils.stream.lazy import lazy_queue
+from AnonXMusic.utils.stream.progressive import progressive
 from AnonXMusic.utils.thumbnails import get_thumb
 from strings import get_string
 
@@ -40,6 +45,9 @@ autoend = {}
 counter = {}
 
 async def _clear_(chat_id):
+    playlist_feeds.drop(chat_id)
+    cancel_chat(chat_id, db.get(chat_id))
+    content_cache.release_queue(db.get(chat_id))
     db[chat_id] = []
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
@@ -228,7 +236,8 @@ class Call(PyTgCalls):
         assistant = await group_assistant(self, chat_id)
         try:
             check = db.get(chat_id)
-            check.pop(0)
+            popped = check.pop(0)
+            await auto_clean(popped)
         except:
             pass
         await remove_active_video_chat(chat_id)
@@ -251,14 +260,68 @@ class Call(PyTgCalls):
                 link,
                 audio_parameters=HighQualityAudio(),
                 video_parameters=MediumQualityVideo(),
+                additional_ffmpeg_parameters=self._input_parameters(chat_id, link),
             )
         else:
-            stream = AudioPiped(link, audio_parameters=HighQualityAudio())
+            stream = AudioPiped(
+                link,
+                audio_parameters=HighQualityAudio(),
+                additional_ffmpeg_parameters=self._input_parameters(chat_id, link),
+            )
         await assistant.change_stream(
             chat_id,
             stream,
         )
 
+    def _input_parameters(self, chat_id: int, path) -> str:
+        """
+        ffmpeg input options for `path`. A file that is still downloading is
+        followed as it grows, and re-opened once its download completes.
+        """
+        parameters = progressive.ffmpeg_parameters(path)
+        if parameters:
+            progressive.when_done(
+                path,
+                chat_id,
+                lambda ok: ok and asyncio.ensure_future(self._reopen(chat_id, path)),
+            )
+        return parameters
+
+    async def _reopen(self, chat_id: int, path, rewind: int = 0) -> bool:
+        """
+        Restart the playing track from its current position. Once its
+        download has completed, this drops the follow so playback ends at the
+        real end of the file. While the file still grows, it resumes the
+        follow after a read stall, `rewind` seconds back to cover the silence.
+        """
+        playing = db.get(chat_id)
+        if not playing or str(playing[0]["file"]) != str(path) or playing[0].get("speed_path"):
+            return False
+        position = max(0, playing[0]["played"] - rewind)
+        playing[0]["played"] = position
+        parameters = f"-ss {seconds_to_min(position)} " + self._input_parameters(chat_id, path)
+        stream = (
+            AudioVideoPiped(
+                path,
+                audio_parameters=HighQualityAudio(),
+                video_parameters=MediumQualityVideo(),
+                additional_ffmpeg_parameters=parameters,
+            )
+            if playing[0]["streamtype"] == "video"
+            else AudioPiped(
+                path,
+                audio_parameters=HighQualityAudio(),
+                additional_ffmpeg_parameters=parameters,
+            )
+        )
+        assistant = await group_assistant(self, chat_id)
+        try:
+            await assistant.change_stream(chat_id, stream)
+        except Exception as e:
+            LOGGER(__name__).warning("Re-opening %s failed: %s", path, e)
+            return False
+        return True
+
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
         assistant = await group_assistant(self, chat_id)
         stream = (
@@ -303,6 +366,7 @@ class Call(PyTgCalls):
                 link,
                 audio_parameters=HighQualityAudio(),
                 video_parameters=MediumQualityVideo(),
+                additional_ffmpeg_parameters=self._input_parameters(chat_id, link),
             )
         else:
             stream = (
@@ -312,7 +376,11 @@ class Call(PyTgCalls):
                     video_parameters=MediumQualityVideo(),
                 )
                 if video
-                else AudioPiped(link, audio_parameters=HighQualityAudio())
+                else AudioPiped(
+                    link,
+                    audio_parameters=HighQualityAudio(),
+                    additional_ffmpeg_parameters=self._input_parameters(chat_id, link),
+                )
             )
         try:
             await assistant.join_group_call(
@@ -357,6 +425,15 @@ class Call(PyTgCalls):
             except:
                 return
         else:
+            await lazy_queue.head(chat_id)
+            if not check:
+                # None of the remaining tracks could be matched
+                try:
+                    await _clear_(chat_id)
+                    return await client.leave_group_call(chat_id)
+                except:
+                    return
+            playlist_feeds.refill(chat_id)
             queued = check[0]["file"]
             language = await get_lang(chat_id)
             _ = get_string(language)
@@ -406,10 +483,31 @@ class Call(PyTgCalls):
                 try:
                     await client.change_stream(chat_id, stream)
                 except Exception:
-                    return await app.send_message(
-                        original_chat_id,
-                        text=_["call_6"],
+                    if n != 1:
+                        return await app.send_message(
+                            original_chat_id,
+                            text=_["call_6"],
+                        )
+                    n, link = await YouTube.video(videoid, True, fresh=True)
+                    stream = (
+                        AudioVideoPiped(
+                            link,
+                            audio_parameters=HighQualityAudio(),
+                            video_parameters=MediumQualityVideo(),
+                        )
+                        if video
+                        else AudioPiped(
+                            link,
+                            audio_parameters=HighQualityAudio(),
+                        )
                     )
+                    try:
+                        await client.change_stream(chat_id, stream)
+                    except Exception:
+                        return await app.send_message(
+                            original_chat_id,
+                            text=_["call_6"],
+                        )
                 # Use Apple Music artwork if available
                 if apple_metadata and apple_metadata.get("apple_artwork"):
                     img = apple_metadata["apple_artwork"]
@@ -451,21 +549,26 @@ class Call(PyTgCalls):
                         mystic,
                         videoid=True,
                         video=True if str(streamtype) == "video" else False,
+                        token=check[0].get("token"),
                     )
                 except:
                     return await mystic.edit_text(
                         _["call_6"], disable_web_page_preview=True
                     )
+                if direct:
+                    content_cache.adopt(check[0], file_path)
                 if video:
                     stream = AudioVideoPiped(
                         file_path,
                         audio_parameters=HighQualityAudio(),
                         video_parameters=MediumQualityVideo(),
+                        additional_ffmpeg_parameters=self._input_parameters(chat_id, file_path),
                     )
                 else:
                     stream = AudioPiped(
                         file_path,
                         audio_parameters=HighQualityAudio(),
+                        additional_ffmpeg_parameters=self._input_parameters(chat_id, file_path),
                     )
                 try:
                     await client.change_stream(chat_id, stream)
@@ -540,11 +643,13 @@ class Call(PyTgCalls):
                         queued,
                         audio_parameters=HighQualityAudio(),
                         video_parameters=MediumQualityVideo(),
+                        additional_ffmpeg_parameters=self._input_parameters(chat_id, queued),
                     )
                 else:
                     stream = AudioPiped(
                         queued,
                         audio_parameters=HighQualityAudio(),
+                        additional_ffmpeg_parameters=self._input_parameters(chat_id, queued),
                     )
                 try:
                     await client.change_stream(chat_id, stream)
@@ -668,6 +773,13 @@ class Call(PyTgCalls):
         async def stream_end_handler1(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
+            # A read stall on a file that is still downloading is not the end of the track
+            playing = db.get(update.chat_id)
+            if playing and progressive.is_growing(playing[0]["file"]):
+                if await self._reopen(
+                    update.chat_id, playing[0]["file"], progressive.stall_timeout
+                ):
+                    return
             await self.change_stream(client, update.chat_id)
 
 Anony = Call()
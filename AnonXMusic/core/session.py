@@ -0,0 +1,75 @@
+import time
+from typing import Optional
+
+import aiohttp
+
+from AnonXMusic.logging import LOGGER
+from config import HTTP_KEEPALIVE_EXPIRY, HTTP_MAX_CONNECTIONS_PER_HOST
+
+
+class SessionPool:
+    """
+    One aiohttp session shared by the bot's small HTTP clients (iTunes,
+    Spotify, Resso, carbon, thumbnails, pastebin, cookies). Connections stay
+    alive between calls, DNS answers are cached, every host has its own
+    connection limit and requests are traced so slow ones show up in the log.
+    Extra `aiohttp.TraceConfig`s can be added before the session is created.
+    """
+
+    TOTAL_CONNECTIONS = 100
+    DNS_TTL = 300
+    TIMEOUT = 30
+    # Requests slower than this many seconds are logged
+    SLOW_REQUEST = 5
+
+    def __init__(self) -> None:
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.traces: list[aiohttp.TraceConfig] = [self._timing()]
+
+    def _timing(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_start(session, ctx, params):
+            ctx.started = time.monotonic()
+
+        async def on_end(session, ctx, params):
+            elapsed = time.monotonic() - ctx.started
+            if elapsed > self.SLOW_REQUEST:
+                LOGGER(__name__).info(
+                    "%s %s took %.1fs", params.method, params.url.host, elapsed
+                )
+
+        async def on_exception(session, ctx, params):
+            LOGGER(__name__).debug(
+                "%s %s failed: %s", params.method, params.url.host, params.exception
+            )
+
+        trace.on_request_start.append(on_start)
+        trace.on_request_end.append(on_end)
+        trace.on_request_exception.append(on_exception)
+        return trace
+
+    def get(self) -> aiohttp.ClientSession:
+        """The shared session, created on first use (it must be inside the running loop)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.TOTAL_CONNECTIONS,
+                limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=self.DNS_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_EXPIRY,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+                trace_configs=self.traces,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared session; called on shutdown."""
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+
+session_pool = SessionPool()
@@ -0,0 +1,114 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from config import TRANSFER_SLOTS
+
+PLAYBACK = "playback"
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Highest priority first
+CLASSES = (PLAYBACK, INTERACTIVE, BULK)
+
+_current = ContextVar("transfer_class", default=INTERACTIVE)
+
+
+class TransferScheduler:
+    """
+    Hands out the bot client's upload/download slots by priority class.
+    Waiting playback transfers are served before interactive ones, and those
+    before bulk ones. Interactive and bulk transfers have their own caps so
+    part of the pool is always left for the next track to start. When the
+    pool is full, a playback or interactive transfer preempts a bulk one,
+    which is background work that is retried later.
+    """
+
+    def __init__(self, total: int = TRANSFER_SLOTS) -> None:
+        self.total = max(total, 3)
+        self.limits = {
+            PLAYBACK: self.total,
+            INTERACTIVE: max(1, self.total // 2),
+            BULK: max(1, self.total // 4),
+        }
+        self._active = {cls: 0 for cls in CLASSES}
+        self._waiters: dict[str, deque] = {cls: deque() for cls in CLASSES}
+        self._holders: dict[str, set] = {cls: set() for cls in CLASSES}
+
+    @staticmethod
+    def current() -> str:
+        return _current.get()
+
+    @contextmanager
+    def priority(self, cls: str):
+        """Run the enclosed block's Telegram transfers in the given class."""
+        token = _current.set(cls)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def _can_run(self, cls: str) -> bool:
+        return sum(self._active.values()) < self.total and self._active[cls] < self.limits[cls]
+
+    def _wake(self) -> None:
+        for cls in CLASSES:
+            waiters = self._waiters[cls]
+            while waiters and self._can_run(cls):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._active[cls] += 1
+                future.set_result(None)
+
+    async def acquire(self, cls: str) -> None:
+        higher = any(self._waiters[c] for c in CLASSES[: CLASSES.index(cls) + 1])
+        if not higher and self._can_run(cls):
+            self._active[cls] += 1
+        else:
+            if cls != BULK and sum(self._active.values()) >= self.total:
+                self._preempt()
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[cls].append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release(cls)
+                else:
+                    try:
+                        self._waiters[cls].remove(future)
+                    except ValueError:
+                        pass
+                raise
+        task = asyncio.current_task()
+        if task:
+            self._holders[cls].add(task)
+
+    def release(self, cls: str, task: asyncio.Task = None) -> None:
+        """Free a slot; `task` is the holder when releasing from another task."""
+        task = task or asyncio.current_task()
+        if task:
+            self._holders[cls].discard(task)
+        self._active[cls] = max(0, self._active[cls] - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, cls: str = None):
+        cls = cls or self.current()
+        await self.acquire(cls)
+        try:
+            yield
+        finally:
+            self.release(cls)
+
+    def _preempt(self) -> None:
+        """Cancel one bulk transfer; its slot goes to the highest waiting class."""
+        for task in self._holders[BULK]:
+            if not task.done():
+                task.cancel()
+                return
+
+
+transfers = TransferScheduler()
@@ -1,11 +1,15 @@
 
 import re
 import aiohttp
-import asyncio
 from typing import Union
 from bs4 import BeautifulSoup
 from youtubesearchpython.__future__ import VideosSearch
 
+from AnonXMusic.core.session import session_pool
+from AnonXMusic.platforms._limiter import TokenBucket
+from AnonXMusic.platforms._matches import ResolvingTracks, matcher, unresolved
+from config import PLAYLIST_FETCH_LIMIT, QUEUE_LOOKAHEAD
+
 
 class AppleAPI:
     def __init__(self):
@@ -14,11 +18,11 @@ class AppleAPI:
         self.base = "https://music.apple.com/in/playlist/"
         self.itunes_api = "https://itunes.apple.com/lookup?id={}"
         self.itunes_search_api = "https://itunes.apple.com/search?term={}&media=music&entity=song&limit=1"
+        self.itunes_batch = 50
 
-        # Rate limiting semaphore for YouTube searches (1 request per 2 seconds)
-        self.youtube_semaphore = asyncio.Semaphore(1)
-        self.last_youtube_request = 0
-        self.youtube_delay = 2.0  # 2 seconds between requests
+        # Rate limit for YouTube searches: one every 2 seconds on average, bursts of 3
+        self.youtube_bucket = TokenBucket(rate=0.5, burst=3)
+        matcher.register("apple", self._youtube_candidates)
 
     async def valid(self, link: str):
         return bool(re.search(self.regex, link))
@@ -59,57 +63,75 @@ class AppleAPI:
         """
         url = self.itunes_api.format(track_id)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status != 200:
-                        return None
+            session = session_pool.get()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                if resp.status != 200:
+                    return None
 
-                    # Fix: Override content_type to None to bypass MIME type check
-                    # iTunes API returns text/javascript instead of application/json
-                    data = await resp.json(content_type=None)
+                # Fix: Override content_type to None to bypass MIME type check
+                # iTunes API returns text/javascript instead of application/json
+                data = await resp.json(content_type=None)
 
-                    if not data.get("results"):
-                        return None
-                    return data["results"][0]  # first track
+                if not data.get("results"):
+                    return None
+                return data["results"][0]  # first track
         except Exception as e:
             print(f"iTunes API Error: {str(e)}")
             return None
 
-    async def _youtube_search_with_rate_limit(self, query: str):
+    async def _itunes_lookup_many(self, track_ids: list) -> dict:
         """
-        Search YouTube with rate limiting to prevent being throttled
+        Look up many tracks in one iTunes request (the endpoint takes
+        comma-separated ids); returns {track id: result}.
         """
-        async with self.youtube_semaphore:
-            # Calculate time since last request
-            current_time = asyncio.get_event_loop().time()
-            time_since_last = current_time - self.last_youtube_request
-
-            # If not enough time has passed, wait
-            if time_since_last < self.youtube_delay:
-                wait_time = self.youtube_delay - time_since_last
-                await asyncio.sleep(wait_time)
-
+        found = {}
+        for start in range(0, len(track_ids), self.itunes_batch):
+            url = self.itunes_api.format(",".join(track_ids[start : start + self.itunes_batch]))
             try:
-                results = VideosSearch(query, limit=1)
-                yt_results = await results.next()
-
-                # Update last request time
-                self.last_youtube_request = asyncio.get_event_loop().time()
-
-                if not yt_results.get("result"):
-                    return None
-                return yt_results["result"][0]
+                session = session_pool.get()
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                    if resp.status != 200:
+                        continue
+                    data = await resp.json(content_type=None)
             except Exception as e:
-                print(f"YouTube search error: {str(e)}")
-                # Update last request time even on error
-                self.last_youtube_request = asyncio.get_event_loop().time()
+                print(f"iTunes API Error: {str(e)}")
+                continue
+            for result in data.get("results") or []:
+                if result.get("trackId"):
+                    found[str(result["trackId"])] = result
+        return found
+
+    async def _youtube_search_with_rate_limit(self, query: str, limit: int = 1):
+        """
+        Search YouTube with rate limiting to prevent being throttled
+        """
+        await self.youtube_bucket.acquire()
+        try:
+            results = VideosSearch(query, limit=limit)
+            yt_results = await results.next()
+
+            if not yt_results.get("result"):
                 return None
+            return yt_results["result"]
+        except Exception as e:
+            print(f"YouTube search error: {str(e)}")
+            return None
+
+    async def _youtube_candidates(self, query: str):
+        return await self._youtube_search_with_rate_limit(query, matcher.CANDIDATES) or []
 
-    async def _youtube_search(self, query: str):
+    async def _youtube_match(self, track_id, query: str, artist: str, duration_ms: int):
         """
-        Search YouTube for the given query (now with rate limiting)
+        Map an Apple Music track to a YouTube video through the persistent
+        match cache; only unknown tracks cost a (rate limited) search.
         """
-        return await self._youtube_search_with_rate_limit(query)
+        return await matcher.match(
+            "apple",
+            str(track_id) if track_id else None,
+            query,
+            (duration_ms or 0) // 1000,
+            artist=artist,
+        )
 
     def _calculate_duration_min(self, duration_ms: int):
         """
@@ -155,8 +177,8 @@ class AppleAPI:
         # Create search query for YouTube
         search_query = f"{track_name} {artist_name}".strip()
 
-        # Search YouTube for the track (with rate limiting)
-        yt_data = await self._youtube_search(search_query)
+        # Match the track to a YouTube video (cached, else a rate limited search)
+        yt_data = await self._youtube_match(track_id, search_query, artist_name, duration_ms)
         if not yt_data:
             return False
 
@@ -168,9 +190,9 @@ class AppleAPI:
             # YouTube details (for streaming)
             "title": yt_data["title"],
             "link": yt_data["link"],
-            "vidid": yt_data["id"],
-            "duration_min": yt_data.get("duration", duration_min),
-            "thumb": yt_data["thumbnails"][0]["url"].split("?")[0] if yt_data.get("thumbnails") else artwork_url,
+            "vidid": yt_data["vidid"],
+            "duration_min": yt_data.get("duration_min") or duration_min,
+            "thumb": yt_data.get("thumb") or artwork_url,
 
             # Apple Music metadata
             "apple_title": track_name,
@@ -183,7 +205,82 @@ class AppleAPI:
             "apple_duration_ms": duration_ms,
         }
 
-        return track_details, yt_data["id"]
+        return track_details, yt_data["vidid"]
+
+    async def _playlist_track(self, track_data: dict):
+        """
+        Build a playlist entry (YouTube match + Apple Music metadata) from an
+        iTunes lookup result, or None when it can't be matched.
+        """
+        track_name = track_data.get("trackName", "")
+        artist_name = track_data.get("artistName", "")
+        artwork_url = track_data.get("artworkUrl100", "")
+        duration_ms = track_data.get("trackTimeMillis", 0)
+
+        if not track_name:
+            return None
+
+        # Match the track to a YouTube video (cached, else a rate limited search)
+        search_query = f"{track_name} {artist_name}".strip()
+        yt_data = await self._youtube_match(
+            track_data.get("trackId"), search_query, artist_name, duration_ms
+        )
+        if not yt_data:
+            return None
+
+        return {
+            # YouTube details (for streaming)
+            "title": yt_data["title"],
+            "link": yt_data["link"],
+            "vidid": yt_data["vidid"],
+            "duration_min": yt_data.get("duration_min")
+            or self._calculate_duration_min(duration_ms),
+            "thumb": yt_data.get("thumb") or artwork_url,
+
+            # Apple Music metadata
+            "apple_title": track_name,
+            "apple_artist": artist_name,
+            "apple_album": track_data.get("collectionName", ""),
+            "apple_preview": track_data.get("previewUrl", ""),
+            "apple_artwork": artwork_url,
+            "apple_genre": track_data.get("primaryGenreName", ""),
+            "apple_duration_ms": duration_ms,
+        }
+
+    def _unresolved(self, track_data: dict):
+        """
+        Build a playlist entry that is matched to YouTube only once it nears
+        the head of the queue.
+        """
+        track_name = track_data.get("trackName", "")
+        artist_name = track_data.get("artistName", "")
+        track_id = track_data.get("trackId")
+        return unresolved(
+            "apple",
+            str(track_id) if track_id else None,
+            f"{track_name} {artist_name}".strip(),
+            track_name,
+            (track_data.get("trackTimeMillis") or 0) // 1000,
+            artist=artist_name,
+            apple_title=track_name,
+            apple_artist=artist_name,
+            apple_artwork=track_data.get("artworkUrl100", ""),
+        )
+
+    async def _resolve_tracks(self, tracks: list):
+        """
+        Match the first tracks concurrently; returns once the first one is
+        ready. Tracks further down are queued as unresolved references.
+        """
+        # Nothing past the fetch limit gets queued, so don't spend searches on it
+        tracks = [t for t in tracks[:PLAYLIST_FETCH_LIMIT] if t.get("trackName")]
+        head = QUEUE_LOOKAHEAD + 1
+        results = ResolvingTracks(
+            [self._playlist_track(t) for t in tracks[:head]]
+            + [self._unresolved(t) for t in tracks[head:]]
+        )
+        await results.first()
+        return results
 
     async def playlist(self, url: str, playid: Union[bool, str] = None):
         """
@@ -198,79 +295,28 @@ class AppleAPI:
 
         try:
             # Fetch the playlist page
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                    if response.status != 200:
-                        return False
-                    html = await response.text()
+            session = session_pool.get()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                if response.status != 200:
+                    return False
+                html = await response.text()
 
             # Parse HTML to extract track URLs
             soup = BeautifulSoup(html, "html.parser")
             track_links = soup.find_all("meta", attrs={"property": "music:song"})
 
-            results = []
+            track_ids = []
             for item in track_links[:50]:  # Limit to 50 tracks to avoid timeouts
                 song_url = item.get("content")
-                if not song_url:
-                    continue
+                track_id = self._extract_track_id(song_url) if song_url else None
+                if track_id and track_id not in track_ids:
+                    track_ids.append(track_id)
 
-                try:
-                    # Extract track ID from the song URL
-                    track_id = self._extract_track_id(song_url)
-                    if not track_id:
-                        continue
-
-                    # Get track info from iTunes API
-                    itunes_data = await self._itunes_lookup(track_id)
-                    if not itunes_data:
-                        continue
-
-                    # Extract track metadata
-                    track_name = itunes_data.get("trackName", "")
-                    artist_name = itunes_data.get("artistName", "")
-                    album_name = itunes_data.get("collectionName", "")
-                    preview_url = itunes_data.get("previewUrl", "")
-                    artwork_url = itunes_data.get("artworkUrl100", "")
-                    duration_ms = itunes_data.get("trackTimeMillis", 0)
-                    genre = itunes_data.get("primaryGenreName", "")
-
-                    if not track_name:
-                        continue
-
-                    # Create search query for YouTube
-                    search_query = f"{track_name} {artist_name}".strip()
-
-                    # Search YouTube for the track (with rate limiting)
-                    yt_data = await self._youtube_search(search_query)
-                    if not yt_data:
-                        continue
+            # One iTunes request for the whole playlist
+            lookup = await self._itunes_lookup_many(track_ids)
+            tracks = [lookup[track_id] for track_id in track_ids if track_id in lookup]
 
-                    # Calculate duration in MM:SS format
-                    duration_min = self._calculate_duration_min(duration_ms)
-
-                    # Add to results
-                    results.append({
-                        # YouTube details (for streaming)
-                        "title": yt_data["title"],
-                        "link": yt_data["link"],
-                        "vidid": yt_data["id"],
-                        "duration_min": yt_data.get("duration", duration_min),
-                        "thumb": yt_data["thumbnails"][0]["url"].split("?")[0] if yt_data.get("thumbnails") else artwork_url,
-
-                        # Apple Music metadata
-                        "apple_title": track_name,
-                        "apple_artist": artist_name,
-                        "apple_album": album_name,
-                        "apple_preview": preview_url,
-                        "apple_artwork": artwork_url,
-                        "apple_genre": genre,
-                        "apple_duration_ms": duration_ms,
-                    })
-
-                except Exception:
-                    continue
-
-            return results, playlist_id
+            return await self._resolve_tracks(tracks), playlist_id
 
         except Exception:
             return False
@@ -289,66 +335,19 @@ class AppleAPI:
         try:
             # Get album info and tracks from iTunes API
             lookup_url = f"https://itunes.apple.com/lookup?id={album_id}&entity=song"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(lookup_url, timeout=aiohttp.ClientTimeout(total=15)) as resp:
-                    if resp.status != 200:
-                        return False
+            session = session_pool.get()
+            async with session.get(lookup_url, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                if resp.status != 200:
+                    return False
 
-                    # Fix: Override content_type to None to bypass MIME type check
-                    data = await resp.json(content_type=None)
+                # Fix: Override content_type to None to bypass MIME type check
+                data = await resp.json(content_type=None)
 
-                    if not data.get("results"):
-                        return False
+                if not data.get("results"):
+                    return False
 
-            results = []
             # Skip the first result (album info) and process tracks
-            for track_data in data["results"][1:]:
-                try:
-                    track_name = track_data.get("trackName", "")
-                    artist_name = track_data.get("artistName", "")
-                    album_name = track_data.get("collectionName", "")
-                    preview_url = track_data.get("previewUrl", "")
-                    artwork_url = track_data.get("artworkUrl100", "")
-                    duration_ms = track_data.get("trackTimeMillis", 0)
-                    genre = track_data.get("primaryGenreName", "")
-
-                    if not track_name:
-                        continue
-
-                    # Create search query for YouTube
-                    search_query = f"{track_name} {artist_name}".strip()
-
-                    # Search YouTube for the track (with rate limiting)
-                    yt_data = await self._youtube_search(search_query)
-                    if not yt_data:
-                        continue
-
-                    # Calculate duration in MM:SS format
-                    duration_min = self._calculate_duration_min(duration_ms)
-
-                    # Add to results
-                    results.append({
-                        # YouTube details (for streaming)
-                        "title": yt_data["title"],
-                        "link": yt_data["link"],
-                        "vidid": yt_data["id"],
-                        "duration_min": yt_data.get("duration", duration_min),
-                        "thumb": yt_data["thumbnails"][0]["url"].split("?")[0] if yt_data.get("thumbnails") else artwork_url,
-
-                        # Apple Music metadata
-                        "apple_title": track_name,
-                        "apple_artist": artist_name,
-                        "apple_album": album_name,
-                        "apple_preview": preview_url,
-                        "apple_artwork": artwork_url,
-                        "apple_genre": genre,
-                        "apple_duration_ms": duration_ms,
-                    })
-
-                except Exception:
-                    continue
-
-            return results, album_id
+            return await self._resolve_tracks(data["results"][1:]), album_id
 
         except Exception:
             return False
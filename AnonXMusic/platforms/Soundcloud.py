@@ -1,8 +1,6 @@
-from os import path
-
-from yt_dlp import YoutubeDL
-
+from AnonXMusic.platforms._ytdlp import YtDlpError, ytdlp
 from AnonXMusic.utils.formatters import seconds_to_min
+from config import YTDLP_DOWNLOAD_TIMEOUT
 
 
 class SoundAPI:
@@ -22,12 +20,11 @@ class SoundAPI:
             return False
 
     async def download(self, url):
-        d = YoutubeDL(self.opts)
         try:
-            info = d.extract_info(url)
-        except:
+            info = await ytdlp.download(url, self.opts, YTDLP_DOWNLOAD_TIMEOUT)
+        except YtDlpError:
             return False
-        xyz = path.join("downloads", f"{info['id']}.{info['ext']}")
+        xyz = info["filepath"]
         duration_min = seconds_to_min(info["duration"])
         track_details = {
             "title": info["title"],
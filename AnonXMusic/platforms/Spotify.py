@@ -1,26 +1,36 @@
+import asyncio
+import base64
 import re
+import time
 
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from youtubesearchpython.__future__ import VideosSearch
+import aiohttp
 
 import config
+from AnonXMusic.core.session import session_pool
+from AnonXMusic.platforms._matches import ResolvingTracks, matcher, unresolved
+
+
+class SpotifyError(Exception):
+    pass
 
 
 class SpotifyAPI:
+    API = "https://api.spotify.com/v1"
+    TOKEN_URL = "https://accounts.spotify.com/api/token"
+    MARKET = "US"
+    RETRIES = 3
+
     def __init__(self):
         self.regex = r"^(https:\/\/open.spotify.com\/)(.*)$"
+        self.id_regex = re.compile(
+            r"(?:open\.spotify\.com/(?:intl-[\w-]+/)?|spotify:)"
+            r"(?:track|playlist|album|artist)[/:]([A-Za-z0-9]+)"
+        )
         self.client_id = config.SPOTIFY_CLIENT_ID
         self.client_secret = config.SPOTIFY_CLIENT_SECRET
-        if config.SPOTIFY_CLIENT_ID and config.SPOTIFY_CLIENT_SECRET:
-            self.client_credentials_manager = SpotifyClientCredentials(
-                self.client_id, self.client_secret
-            )
-            self.spotify = spotipy.Spotify(
-                client_credentials_manager=self.client_credentials_manager
-            )
-        else:
-            self.spotify = None
+        self._token = None
+        self._token_expires = 0
+        self._token_lock = asyncio.Lock()
 
     async def valid(self, link: str):
         if re.search(self.regex, link):
@@ -28,54 +38,135 @@ class SpotifyAPI:
         else:
             return False
 
-    async def track(self, link: str):
-        track = self.spotify.track(link)
+    def _id(self, link: str) -> str:
+        """Spotify id from a URL, URI or bare id."""
+        match = self.id_regex.search(link)
+        return match.group(1) if match else link.split("?")[0].strip("/")
+
+    async def _access_token(self, session: aiohttp.ClientSession) -> str:
+        """Client-credentials token, reused until shortly before it expires."""
+        async with self._token_lock:
+            if self._token and time.time() < self._token_expires - 60:
+                return self._token
+            if not self.client_id or not self.client_secret:
+                raise SpotifyError("Spotify credentials are not configured")
+            auth = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            async with session.post(
+                self.TOKEN_URL,
+                data={"grant_type": "client_credentials"},
+                headers={"Authorization": f"Basic {auth}"},
+                timeout=aiohttp.ClientTimeout(total=10),
+            ) as resp:
+                if resp.status != 200:
+                    raise SpotifyError(f"Token request failed with HTTP {resp.status}")
+                data = await resp.json()
+            self._token = data["access_token"]
+            self._token_expires = time.time() + data.get("expires_in", 3600)
+            return self._token
+
+    async def _get(self, url: str, **params) -> dict:
+        if not url.startswith("http"):
+            url = f"{self.API}/{url}"
+        session = session_pool.get()
+        for attempt in range(self.RETRIES):
+            token = await self._access_token(session)
+            async with session.get(
+                url,
+                params=params or None,
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=aiohttp.ClientTimeout(total=15),
+            ) as resp:
+                if resp.status == 200:
+                    return await resp.json()
+                if resp.status == 401:
+                    self._token = None
+                    continue
+                if resp.status == 429 or resp.status >= 500:
+                    retry_after = int(resp.headers.get("Retry-After", 1))
+                    await asyncio.sleep(min(retry_after, 10) + attempt)
+                    continue
+                raise SpotifyError(f"GET {url} failed with HTTP {resp.status}")
+        raise SpotifyError(f"GET {url} kept failing")
+
+    async def _items(self, page: dict, limit: int = config.PLAYLIST_FETCH_LIMIT) -> list:
+        """Collect items from a paging object, fetching further pages only until `limit`."""
+        items = []
+        while page:
+            for item in page.get("items") or []:
+                items.append(item)
+                if len(items) >= limit:
+                    return items
+            if not page.get("next"):
+                break
+            page = await self._get(page["next"])
+        return items
+
+    @staticmethod
+    def _query(track: dict) -> str:
         info = track["name"]
         for artist in track["artists"]:
             fetched = f' {artist["name"]}'
             if "Various Artists" not in fetched:
                 info += fetched
-        results = VideosSearch(info, limit=1)
-        for result in (await results.next())["result"]:
-            ytlink = result["link"]
-            title = result["title"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        track_details = {
-            "title": title,
-            "link": ytlink,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
-        }
-        return track_details, vidid
+        return info
+
+    async def _resolve(self, track: dict):
+        return await matcher.match(
+            "spotify",
+            track.get("id"),
+            self._query(track),
+            (track.get("duration_ms") or 0) // 1000,
+            artist=" ".join(a["name"] for a in track["artists"]),
+        )
+
+    def _unresolved(self, track: dict) -> dict:
+        return unresolved(
+            "spotify",
+            track.get("id"),
+            self._query(track),
+            track["name"],
+            (track.get("duration_ms") or 0) // 1000,
+            artist=" ".join(a["name"] for a in track["artists"]),
+        )
+
+    async def _resolve_all(self, tracks: list):
+        """
+        Match the first tracks concurrently and return once one is ready;
+        the rest are queued as references and matched just in time.
+        """
+        tracks = [t for t in tracks if t and t.get("name")][: config.PLAYLIST_FETCH_LIMIT]
+        head = config.QUEUE_LOOKAHEAD + 1
+        results = ResolvingTracks(
+            [self._resolve(track) for track in tracks[:head]]
+            + [self._unresolved(track) for track in tracks[head:]]
+        )
+        await results.first()
+        return results
+
+    async def track(self, link: str):
+        track = await self._get(f"tracks/{self._id(link)}")
+        track_details = await self._resolve(track)
+        if not track_details:
+            raise SpotifyError(f"No YouTube match for {track.get('name')!r}")
+        return track_details, track_details["vidid"]
 
     async def playlist(self, url):
-        playlist = self.spotify.playlist(url)
-        playlist_id = playlist["id"]
-        results = []
-        for item in playlist["tracks"]["items"]:
-            music_track = item["track"]
-            info = music_track["name"]
-            for artist in music_track["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        playlist_id = self._id(url)
+        page = await self._get(
+            f"playlists/{playlist_id}/tracks",
+            limit=min(100, config.PLAYLIST_FETCH_LIMIT),
+            market=self.MARKET,
+        )
+        items = await self._items(page)
+        results = await self._resolve_all([item.get("track") for item in items])
         return results, playlist_id
 
     async def album(self, url):
-        album = self.spotify.album(url)
-        album_id = album["id"]
-        results = []
-        for item in album["tracks"]["items"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        album_id = self._id(url)
+        page = await self._get(
+            f"albums/{album_id}/tracks", limit=min(50, config.PLAYLIST_FETCH_LIMIT)
+        )
+        results = await self._resolve_all(await self._items(page))
 
         return (
             results,
@@ -83,16 +174,8 @@ class SpotifyAPI:
         )
 
     async def artist(self, url):
-        artistinfo = self.spotify.artist(url)
-        artist_id = artistinfo["id"]
-        results = []
-        artisttoptracks = self.spotify.artist_top_tracks(url)
-        for item in artisttoptracks["tracks"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+        artist_id = self._id(url)
+        artisttoptracks = await self._get(f"artists/{artist_id}/top-tracks", market=self.MARKET)
+        results = await self._resolve_all(artisttoptracks["tracks"])
 
         return results, artist_id
@@ -3,16 +3,19 @@ import os
 import time
 from typing import Union
 
+import aiofiles
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Voice
 
 import config
 from AnonXMusic import app
+from AnonXMusic.core.transfers import PLAYBACK, transfers
 from AnonXMusic.utils.formatters import (
     check_duration,
     convert_bytes,
     get_readable_time,
     seconds_to_min,
 )
+from AnonXMusic.utils.stream.progressive import progressive
 
 
 class TeleAPI:
@@ -92,85 +95,107 @@ class TeleAPI:
         return file_name
 
     async def download(self, _, message, mystic, fname):
-        lower = [0, 8, 17, 38, 64, 77, 96]
-        higher = [5, 10, 20, 40, 66, 80, 99]
-        checker = [5, 10, 20, 40, 66, 80, 99]
-        speed_counter = {}
         if os.path.exists(fname):
             return True
+        media_message = message.reply_to_message
+        started = time.time()
+        ready = asyncio.Event()
+        last_edit = [0.0]
+        upl = InlineKeyboardMarkup(
+            [
+                [
+                    InlineKeyboardButton(
+                        text="ᴄᴀɴᴄᴇʟ",
+                        callback_data="stop_downloading",
+                    ),
+                ]
+            ]
+        )
 
-        async def down_load():
-            async def progress(current, total):
-                if current == total:
-                    return
-                current_time = time.time()
-                start_time = speed_counter.get(message.id)
-                check_time = current_time - start_time
-                upl = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                text="ᴄᴀɴᴄᴇʟ",
-                                callback_data="stop_downloading",
-                            ),
-                        ]
-                    ]
+        async def progress(current, total):
+            # Edit at a fixed cadence; stop once playback has started
+            now = time.time()
+            if ready.is_set() or not total or current == total:
+                return
+            if now - last_edit[0] < self.sleep:
+                return
+            last_edit[0] = now
+            speed = current / max(now - started, 1e-3)
+            eta = get_readable_time(int((total - current) / speed)) if speed else None
+            try:
+                await mystic.edit_text(
+                    text=_["tg_1"].format(
+                        app.mention,
+                        convert_bytes(total),
+                        convert_bytes(current),
+                        str(round(current * 100 / total, 2))[:5],
+                        convert_bytes(speed),
+                        eta or "0 sᴇᴄᴏɴᴅs",
+                    ),
+                    reply_markup=upl,
                 )
-                percentage = current * 100 / total
-                percentage = str(round(percentage, 2))
-                speed = current / check_time
-                eta = int((total - current) / speed)
-                eta = get_readable_time(eta)
-                if not eta:
-                    eta = "0 sᴇᴄᴏɴᴅs"
-                total_size = convert_bytes(total)
-                completed_size = convert_bytes(current)
-                speed = convert_bytes(speed)
-                percentage = int((percentage.split("."))[0])
-                for counter in range(7):
-                    low = int(lower[counter])
-                    high = int(higher[counter])
-                    check = int(checker[counter])
-                    if low < percentage <= high:
-                        if high == check:
-                            try:
-                                await mystic.edit_text(
-                                    text=_["tg_1"].format(
-                                        app.mention,
-                                        total_size,
-                                        completed_size,
-                                        percentage[:5],
-                                        speed,
-                                        eta,
-                                    ),
-                                    reply_markup=upl,
-                                )
-                                checker[counter] = 100
-                            except:
-                                pass
-
-            speed_counter[message.id] = time.time()
+            except:
+                pass
+
+        async def finished():
+            elapsed = get_readable_time(int(time.time() - started)) or "0 sᴇᴄᴏɴᴅs"
+            try:
+                await mystic.edit_text(_["tg_2"].format(elapsed))
+            except:
+                pass
+
+        async def down_load():
             try:
                 await app.download_media(
-                    message.reply_to_message,
+                    media_message,
                     file_name=fname,
                     progress=progress,
                 )
-                try:
-                    elapsed = get_readable_time(
-                        int(int(time.time()) - int(speed_counter[message.id]))
-                    )
-                except:
-                    elapsed = "0 sᴇᴄᴏɴᴅs"
-                await mystic.edit_text(_["tg_2"].format(elapsed))
+                await finished()
+            except asyncio.CancelledError:
+                raise
             except:
                 await mystic.edit_text(_["tg_3"])
 
-        task = asyncio.create_task(down_load())
+        async def stream_load():
+            # Write chunks as they arrive so the call can start on a growing file
+            media = getattr(media_message, media_message.media.value)
+            total = media.file_size or 0
+            written = 0
+            ok = False
+            # None until the header has been read; then whether playback can start early
+            streamable = None
+            progressive.begin(fname)
+            try:
+                async with aiofiles.open(fname, "wb") as f:
+                    async for chunk in app.stream_media(media_message):
+                        await f.write(chunk)
+                        await f.flush()
+                        written += len(chunk)
+                        await progress(written, total)
+                        if streamable is None and written < total:
+                            streamable = progressive.playable(fname, written)
+                            if streamable:
+                                ready.set()
+                ok = not total or written == total
+                if not ready.is_set():
+                    await finished()
+            except asyncio.CancelledError:
+                raise
+            except:
+                if not ready.is_set():
+                    await mystic.edit_text(_["tg_3"])
+            finally:
+                progressive.end(fname, ok)
+                ready.set()
+
+        with transfers.priority(PLAYBACK):
+            task = asyncio.create_task(stream_load() if progressive.enabled else down_load())
         config.lyrical[mystic.id] = task
-        await task
-        verify = config.lyrical.get(mystic.id)
-        if not verify:
+        task.add_done_callback(lambda _: config.lyrical.pop(mystic.id, None))
+        waiter = asyncio.create_task(ready.wait())
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if task.cancelled():
             return False
-        config.lyrical.pop(mystic.id)
-        return True
+        return os.path.exists(fname)
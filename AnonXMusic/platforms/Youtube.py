@@ -1,44 +1,105 @@
 import asyncio
-import os
-import random
 import re
 from pathlib import Path
-from typing import Union, Optional
+from typing import Callable, Union, Optional
 
-import yt_dlp
 from pyrogram import errors
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
 from youtubesearchpython.__future__ import VideosSearch
 
+from AnonXMusic.core.transfers import PLAYBACK, transfers
 from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.platforms._flight import flights
 from AnonXMusic.platforms._httpx import HttpxClient
+from AnonXMusic.platforms._index import track_index
+from AnonXMusic.platforms._matches import unresolved
+from AnonXMusic.platforms._mirror import mirror
+from AnonXMusic.platforms._router import router
+from AnonXMusic.platforms._search import searches
+from AnonXMusic.platforms._urlcache import url_cache
+from AnonXMusic.platforms._ytdlp import PROFILES, YtDlpError, ytdlp
+from AnonXMusic.utils.cookies import cookie_pool
 from AnonXMusic.utils.database import is_on_off
 from AnonXMusic.utils.formatters import time_to_seconds
-from config import API_URL, API_KEY
+from AnonXMusic.utils.stream.progressive import progressive
+from config import (
+    API_URL,
+    API_KEY,
+    DOWNLOADS_DIR,
+    DURATION_LIMIT,
+    QUALITY_PROFILE,
+    TG_AUDIO_FILESIZE_LIMIT,
+    TG_VIDEO_FILESIZE_LIMIT,
+    YTDLP_DOWNLOAD_TIMEOUT,
+)
+
+PROFILE = QUALITY_PROFILE if QUALITY_PROFILE in PROFILES else "standard"
 
 class YouTubeUtils:
+    STREAM_FORMAT = "best[height<=?{0}][width<=?{1}]".format(
+        PROFILES[PROFILE]["height"], PROFILES[PROFILE]["height"] * 16 // 9
+    )
+
     @staticmethod
     def get_cookie_file() -> Optional[str]:
-        """Get a random cookie file from the cookies directory."""
-        cookie_dir = "AnonXMusic/assets"
-        try:
-            if not os.path.exists(cookie_dir):
-                LOGGER(__name__).warning("Cookie directory '%s' does not exist.", cookie_dir)
-                return None
+        """Pick a healthy cookie file from the cookie pool."""
+        cookie = cookie_pool.choose()
+        if not cookie:
+            LOGGER(__name__).warning("No cookie files found in '%s'.", cookie_pool.directory)
+        return cookie
 
-            files = os.listdir(cookie_dir)
-            cookies_files = [f for f in files if f.endswith(".txt")]
+    @staticmethod
+    async def ytdlp_call(method, link: str, opts: dict, *args):
+        """Run a yt-dlp pool call and report the outcome against the cookie it used."""
+        cookie = opts.get("cookiefile")
+        try:
+            result = await method(link, opts, *args)
+        except YtDlpError as e:
+            cookie_pool.report(cookie, cookie_pool.classify(str(e)))
+            raise
+        cookie_pool.report(cookie, "ok")
+        return result
 
-            if not cookies_files:
-                LOGGER(__name__).warning("No cookie files found in '%s'.", cookie_dir)
-                return None
+    @staticmethod
+    def extract_video_id(link: str) -> Optional[str]:
+        """Return the 11-character video id from a YouTube URL or a bare id."""
+        if not link.startswith("http"):
+            return link
+        match = re.search(r"(?:v=|/)([0-9A-Za-z_-]{11})", link)
+        return match.group(1) if match else None
 
-            random_file = random.choice(cookies_files)
-            return os.path.join(cookie_dir, random_file)
-        except Exception as e:
-            LOGGER(__name__).warning("Error accessing cookie directory: %s", e)
-            return None
+    @staticmethod
+    async def stream_url(link: str, live: bool = False) -> Optional[str]:
+        """Resolve a direct stream URL for the quality profile, served from the expiry-aware cache."""
+        fmt = YouTubeUtils.STREAM_FORMAT
+        vidid = YouTubeUtils.extract_video_id(link) or link
+
+        async def resolver() -> Optional[str]:
+            urls = await YouTubeUtils.ytdlp_call(
+                ytdlp.stream_urls,
+                link,
+                {
+                    "format": fmt,
+                    "cookiefile": YouTubeUtils.get_cookie_file(),
+                    "quiet": True,
+                    "no_warnings": True,
+                },
+            )
+            return urls[0] if urls else None
+
+        def queued() -> bool:
+            return any(
+                str(entry.get("file")) == f"live_{vidid}"
+                for queue in db.values()
+                if isinstance(queue, list)
+                for entry in queue
+            )
+
+        return await url_cache.resolve(
+            (vidid, fmt), resolver, keep_fresh=queued if live else None
+        )
 
     @staticmethod
     async def shell(command: str) -> tuple[int, str, str]:
@@ -52,7 +113,43 @@ class YouTubeUtils:
         return proc.returncode, stdout.decode() if stdout else "", stderr.decode() if stderr else ""
 
     @staticmethod
-    async def download_with_api(video_id: str, is_video: bool = False) -> Optional[Path]:
+    def log_selection(vidid: str, info: dict) -> None:
+        if selected := info.get("selected"):
+            LOGGER(__name__).info(
+                "%s: %s profile picked format %s (%s kbps, %sp, %.1f MiB)",
+                vidid,
+                selected["profile"],
+                selected["format_id"],
+                selected["abr"] or "?",
+                selected["height"] or "-",
+                selected["filesize"] / 1048576,
+            )
+
+    @staticmethod
+    async def race(api_attempt, ytdlp_attempt):
+        """Hedge the download API against yt-dlp; the API is skipped when not configured."""
+        attempts = [("api", api_attempt)] if API_URL and API_KEY else []
+        attempts.append(("ytdlp", ytdlp_attempt))
+        return await router.race(attempts)
+
+    @staticmethod
+    def answering(answer, progress):
+        """Progress callback that also tells the router this source has started delivering."""
+
+        def report(*args):
+            answer()
+            progress(*args)
+
+        return report
+
+    @staticmethod
+    async def download_with_api(
+        video_id: str,
+        is_video: bool = False,
+        progress: Optional[Callable[..., None]] = None,
+        progressive: bool = False,
+        max_size: int = 0,
+    ) -> Optional[Path]:
 
         if not API_URL or not API_KEY:
             LOGGER(__name__).warning("API URL or KEY not set")
@@ -64,18 +161,17 @@ class YouTubeUtils:
         from AnonXMusic import app
 
         # Extract video ID if a full URL is provided
-        if video_id.startswith("http"):
-            match = re.search(r"(?:v=|/)([0-9A-Za-z_-]{11})", video_id)
-            if match:
-                video_id = match.group(1)
-            else:
-                LOGGER(__name__).warning("Could not extract video ID from URL")
-                return None
+        video_id = YouTubeUtils.extract_video_id(video_id)
+        if not video_id:
+            LOGGER(__name__).warning("Could not extract video ID from URL")
+            return None
 
         api_url = f"{API_URL}/yt?api_key={API_KEY}&id={video_id}"
 
         try:
-            get_track = await asyncio.wait_for(HttpxClient().make_request(api_url), timeout=20)
+            get_track = await asyncio.wait_for(
+                HttpxClient.shared(api_url).make_request(api_url), timeout=20
+            )
             if not get_track:
                 LOGGER(__name__).error("Empty API response")
                 return None
@@ -99,8 +195,13 @@ class YouTubeUtils:
                 if not msg:
                     LOGGER(__name__).error("Message not found in Telegram")
                     return None
+                media = getattr(msg, msg.media.value, None) if msg.media else None
+                if max_size and getattr(media, "file_size", 0) > max_size:
+                    LOGGER(__name__).info("API file for %s exceeds %d bytes", video_id, max_size)
+                    return None
 
-                path = await msg.download()
+                with transfers.priority(PLAYBACK):
+                    path = await msg.download()
                 return Path(path) if path else None
 
             elif source == "download_api" and isinstance(data, dict):
@@ -120,21 +221,19 @@ class YouTubeUtils:
                 elif file_type == "video" and ext not in valid_video:
                     ext = ".mp4" if not is_video else ".mkv"
 
-                # Download file
-                dl = await HttpxClient().download_file(cdn_url)
+                # Its own name, so the yt-dlp attempt it races never writes the same file
+                dl = await HttpxClient.shared(cdn_url).download_file(
+                    cdn_url,
+                    file_path=Path(DOWNLOADS_DIR) / f"{video_id}.api{ext}",
+                    progress=progress,
+                    suffix=ext,
+                    progressive=progressive,
+                    max_size=max_size,
+                )
                 if not dl or not dl.success:
                     LOGGER(__name__).error("Download failed")
                     return None
-
-                path = Path(dl.file_path)
-                if path.suffix != ext:
-                    try:
-                        new_path = path.with_suffix(ext)
-                        os.rename(path, new_path)
-                        path = new_path
-                    except Exception as e:
-                        LOGGER(__name__).warning("Failed to rename file: %s", e)
-                return path
+                return Path(dl.file_path)
 
             LOGGER(__name__).warning("Unknown API source: %s", source)
             return None
@@ -147,7 +246,34 @@ class YouTubeUtils:
             return None
 
 
+class PlaylistCursor:
+    """Position in a YouTube playlist; `next()` fetches the following page of references."""
+
+    def __init__(self, api: "YouTubeAPI", link: str, size: int, start: int = 1) -> None:
+        self.api = api
+        self.link = link
+        self.size = size
+        self.start = start
+        self.done = False
+
+    async def next(self) -> list:
+        page = await self.api.playlist_page(self.link, self.start, self.size)
+        self.start += self.size
+        self.done = len(page) < self.size
+        return page
+
+
+class PlaylistPage(list):
+    """The first page of a playlist, with the cursor to the rest (None when there is no more)."""
+
+    def __init__(self, entries: list, cursor: Optional[PlaylistCursor] = None) -> None:
+        super().__init__(entries)
+        self.cursor = cursor
+
+
 class YouTubeAPI:
+    SLIDER_SIZE = 10
+
     def __init__(self):
         self.base = "https://www.youtube.com/watch?v="
         self.regex = r"(?:youtube\.com|youtu\.be)"
@@ -225,50 +351,70 @@ class YouTubeAPI:
         for result in (await results.next())["result"]:
             return result["thumbnails"][0]["url"].split("?")[0]
 
-    async def video(self, link: str, videoid: Union[bool, str] = None):
-        if dl := await YouTubeUtils.download_with_api(link, True):
-            return True, str(dl)
-
+    async def video(self, link: str, videoid: Union[bool, str] = None, fresh: bool = False):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies", YouTubeUtils.get_cookie_file(),
-            "-g",
-            "-f",
-            "best[height<=?720][width<=?1280]",
-            f"{link}",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-        if stdout:
-            return 1, stdout.decode().split("\n")[0]
-        else:
-            return 0, stderr.decode()
+        vidid = YouTubeUtils.extract_video_id(link)
+        if fresh:
+            # The cached URL failed to play; it can be revoked before its expiry
+            url_cache.invalidate((vidid, YouTubeUtils.STREAM_FORMAT))
+        elif cached := url_cache.get((vidid, YouTubeUtils.STREAM_FORMAT)):
+            return 1, cached
+
+        if dl := await YouTubeUtils.download_with_api(link, True):
+            return True, str(dl)
+
+        try:
+            url = await YouTubeUtils.stream_url(link, live=True)
+        except YtDlpError as e:
+            return 0, str(e)
+        if url:
+            return 1, url
+        return 0, "No stream URL found"
+
+    async def playlist_page(self, link: str, start: int, size: int) -> list:
+        """Entries [start, start + size) of a playlist (1-based) as unresolved references."""
+        try:
+            entries = await ytdlp.flat_entries(
+                link,
+                {
+                    "playlist_items": f"{start}-{start + size - 1}",
+                    "ignoreerrors": True,
+                    "quiet": True,
+                    "no_warnings": True,
+                },
+            )
+        except YtDlpError:
+            entries = []
+        # Matched to full details only once they near the head of the queue
+        return [
+            unresolved("youtube", e["id"], e["title"] or e["id"], e["title"], e["duration"])
+            for e in entries
+        ]
 
     async def playlist(self, link, limit, user_id, videoid: Union[bool, str] = None):
+        """
+        The first `limit` tracks of a playlist. Longer playlists carry a
+        cursor that queues the next page once the queue runs low.
+        """
         if videoid:
             link = self.listbase + link
         if "&" in link:
             link = link.split("&")[0]
-        playlist = await shell_cmd(
-            f"yt-dlp -i --get-id --flat-playlist --playlist-end {limit} --skip-download {link}"
-        )
-        try:
-            result = playlist.split("\n")
-            result = [r for r in result if r]
-        except:
-            result = []
-        return result
+        cursor = PlaylistCursor(self, link, limit)
+        page = await cursor.next()
+        return PlaylistPage(page, None if cursor.done else cursor)
 
     async def track(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
+        query = None if videoid or await self.exists(link) else link
+        if query and (indexed := track_index.search(query)):
+            return indexed, indexed["vidid"]
         results = VideosSearch(link, limit=1)
         for result in (await results.next())["result"]:
             title = result["title"]
@@ -276,6 +422,7 @@ class YouTubeAPI:
             vidid = result["id"]
             yturl = result["link"]
             thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+            channel = (result.get("channel") or {}).get("name", "")
         track_details = {
             "title": title,
             "link": yturl,
@@ -283,6 +430,7 @@ class YouTubeAPI:
             "duration_min": duration_min,
             "thumb": thumbnail,
         }
+        track_index.add(track_details, channel=channel, query=query)
         return track_details, vidid
 
     async def formats(self, link: str, videoid: Union[bool, str] = None):
@@ -290,35 +438,32 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        ytdl_opts = {"quiet": True}
-        ydl = yt_dlp.YoutubeDL(ytdl_opts)
-        with ydl:
-            formats_available = []
-            r = ydl.extract_info(link, download=False)
-            for format in r["formats"]:
+        formats_available = []
+        r = await ytdlp.extract(link, {"quiet": True})
+        for format in r["formats"]:
+            try:
+                str(format["format"])
+            except:
+                continue
+            if "dash" not in str(format["format"]).lower():
                 try:
-                    str(format["format"])
+                    format["format"]
+                    format["filesize"]
+                    format["format_id"]
+                    format["ext"]
+                    format["format_note"]
                 except:
                     continue
-                if "dash" not in str(format["format"]).lower():
-                    try:
-                        format["format"]
-                        format["filesize"]
-                        format["format_id"]
-                        format["ext"]
-                        format["format_note"]
-                    except:
-                        continue
-                    formats_available.append(
-                        {
-                            "format": format["format"],
-                            "filesize": format["filesize"],
-                            "format_id": format["format_id"],
-                            "ext": format["ext"],
-                            "format_note": format["format_note"],
-                            "yturl": link,
-                        }
-                    )
+                formats_available.append(
+                    {
+                        "format": format["format"],
+                        "filesize": format["filesize"],
+                        "format_id": format["format_id"],
+                        "ext": format["ext"],
+                        "format_note": format["format_note"],
+                        "yturl": link,
+                    }
+                )
         return formats_available, link
 
     async def slider(self, link: str, query_type: int, videoid: Union[bool, str] = None):
@@ -326,13 +471,24 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        a = VideosSearch(link, limit=10)
-        result = (await a.next()).get("result")
+        # Served from the search cache, so paging through the slider makes no requests
+        result, _ = await searches.page(link, 0, self.SLIDER_SIZE)
+        if not result:
+            return None
+        # Wraps within the results there are; the caller builds its buttons from the returned index
+        query_type %= len(result)
         title = result[query_type]["title"]
         duration_min = result[query_type]["duration"]
         vidid = result[query_type]["id"]
         thumbnail = result[query_type]["thumbnails"][0]["url"].split("?")[0]
-        return title, duration_min, thumbnail, vidid
+        searches.prefetch(link, self.SLIDER_SIZE, around=query_type)
+        return title, duration_min, thumbnail, vidid, query_type
+
+    def prefetch_slider(self, link: str) -> None:
+        """Load the slider's result set and its neighbouring thumbnails while its first page is on screen."""
+        if "&" in link:
+            link = link.split("&")[0]
+        searches.prefetch(link, self.SLIDER_SIZE, around=0)
 
     async def download(
         self,
@@ -344,32 +500,48 @@ class YouTubeAPI:
         songvideo: Union[bool, str] = None,
         format_id: Union[bool, str] = None,
         title: Union[bool, str] = None,
+        token=None,
+        warm: bool = False,
     ) -> str:
+        """
+        Fetch a track for playback. With `warm` the audio is fetched in the
+        background for the cache: to completion, under its own flight key and
+        without a Telegram mirror upload.
+        """
         if videoid:
             link = self.base + link
-        loop = asyncio.get_running_loop()
+        vidid = YouTubeUtils.extract_video_id(link) or link
 
-        def audio_dl():
+        async def audio_dl(progress=None):
             ydl_optssx = {
-                "format": "bestaudio/best",
+                "select": {
+                    "profile": PROFILE,
+                    "max_duration": DURATION_LIMIT,
+                    "max_filesize": TG_AUDIO_FILESIZE_LIMIT,
+                },
                 "outtmpl": "downloads/%(id)s.%(ext)s",
                 "geo_bypass": True,
                 "nocheckcertificate": True,
                 "quiet": True,
                 "cookiefile": YouTubeUtils.get_cookie_file(),
                 "no_warnings": True,
+                # Write straight to the final name so playback can start early
+                "nopart": progressive.enabled and not warm,
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
-            info = x.extract_info(link, False)
-            xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
-            if os.path.exists(xyz):
-                return xyz
-            x.download([link])
-            return xyz
-
-        def video_dl():
+            info = await YouTubeUtils.ytdlp_call(
+                ytdlp.download, link, ydl_optssx, YTDLP_DOWNLOAD_TIMEOUT, progress
+            )
+            YouTubeUtils.log_selection(vidid, info)
+            return info["filepath"]
+
+        async def video_dl(progress=None):
             ydl_optssx = {
-                "format": "(bestvideo[height<=?720][width<=?1280][ext=mp4])+(bestaudio[ext=m4a])",
+                "select": {
+                    "profile": PROFILE,
+                    "video": True,
+                    "max_duration": DURATION_LIMIT,
+                    "max_filesize": TG_VIDEO_FILESIZE_LIMIT,
+                },
                 "outtmpl": "downloads/%(id)s.%(ext)s",
                 "geo_bypass": True,
                 "cookiefile": YouTubeUtils.get_cookie_file(),
@@ -377,15 +549,13 @@ class YouTubeAPI:
                 "quiet": True,
                 "no_warnings": True,
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
-            info = x.extract_info(link, False)
-            xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
-            if os.path.exists(xyz):
-                return xyz
-            x.download([link])
-            return xyz
-
-        def song_video_dl():
+            info = await YouTubeUtils.ytdlp_call(
+                ytdlp.download, link, ydl_optssx, YTDLP_DOWNLOAD_TIMEOUT, progress
+            )
+            YouTubeUtils.log_selection(vidid, info)
+            return info["filepath"]
+
+        async def song_video_dl():
             formats = f"{format_id}+140"
             fpath = f"downloads/{title}"
             ydl_optssx = {
@@ -399,10 +569,11 @@ class YouTubeAPI:
                 "prefer_ffmpeg": True,
                 "merge_output_format": "mp4",
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
-            x.download([link])
+            await YouTubeUtils.ytdlp_call(
+                ytdlp.download, link, ydl_optssx, YTDLP_DOWNLOAD_TIMEOUT
+            )
 
-        def song_audio_dl():
+        async def song_audio_dl():
             fpath = f"downloads/{title}.%(ext)s"
             ydl_optssx = {
                 "format": format_id,
@@ -421,47 +592,92 @@ class YouTubeAPI:
                     }
                 ],
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
-            x.download([link])
+            await YouTubeUtils.ytdlp_call(
+                ytdlp.download, link, ydl_optssx, YTDLP_DOWNLOAD_TIMEOUT
+            )
 
         if songvideo:
-            if dl := await YouTubeUtils.download_with_api(link, True):
-                return str(dl)
-            await loop.run_in_executor(None, song_video_dl)
-            fpath = f"downloads/{title}.mp4"
-            return fpath
+
+            async def ytdlp_song(_):
+                await song_video_dl()
+                return f"downloads/{title}.mp4"
+
+            dl = await YouTubeUtils.race(
+                lambda _: YouTubeUtils.download_with_api(link, True), ytdlp_song
+            )
+            if not dl:
+                raise YtDlpError(f"Could not download {link}")
+            return str(dl)
         elif songaudio:
-            if dl := await YouTubeUtils.download_with_api(link):
-                return str(dl)
-            await loop.run_in_executor(None, song_audio_dl)
-            fpath = f"downloads/{title}.mp3"
-            return fpath
+
+            async def ytdlp_song(_):
+                await song_audio_dl()
+                return f"downloads/{title}.mp3"
+
+            dl = await YouTubeUtils.race(
+                lambda _: YouTubeUtils.download_with_api(link), ytdlp_song
+            )
+            if not dl:
+                raise YtDlpError(f"Could not download {link}")
+            return str(dl)
         elif video:
             if await is_on_off(1):
                 direct = True
-                downloaded_file = await loop.run_in_executor(None, video_dl)
+
+                async def fetch_video(progress):
+                    if path := await mirror.fetch(vidid, "video", progress):
+                        return path
+                    # The yt-dlp pool removes what a cancelled download wrote
+                    path = await video_dl(progress)
+                    await mirror.record(vidid, "video", path)
+                    return path
+
+                downloaded_file = await flights.run(
+                    (vidid, "video", PROFILE), fetch_video, mystic, token
+                )
             else:
-                if dl := await YouTubeUtils.download_with_api(link, True):
+                if dl := await flights.run(
+                    (vidid, "video", "api"),
+                    lambda progress: YouTubeUtils.download_with_api(
+                        link, True, progress, max_size=TG_VIDEO_FILESIZE_LIMIT
+                    ),
+                    mystic,
+                    token,
+                ):
                     return str(dl), None
-                proc = await asyncio.create_subprocess_exec(
-                    "yt-dlp",
-                    "--cookies", YouTubeUtils.get_cookie_file(),
-                    "-g",
-                    "-f",
-                    "best[height<=?720][width<=?1280]",
-                    f"{link}",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await proc.communicate()
-                if stdout:
-                    downloaded_file = stdout.decode().split("\n")[0]
-                    direct = None
-                else:
+                try:
+                    downloaded_file = await YouTubeUtils.stream_url(link)
+                except YtDlpError:
+                    return
+                if not downloaded_file:
                     return
+                direct = None
         else:
             direct = True
-            if dl := await YouTubeUtils.download_with_api(link):
-                return str(dl), direct
-            downloaded_file = await loop.run_in_executor(None, audio_dl)
+
+            async def fetch_audio(progress):
+                if path := await mirror.fetch(vidid, "audio", progress):
+                    return path
+                # Each attempt removes the files it wrote itself when it is cancelled
+                dl = await YouTubeUtils.race(
+                    lambda answer: YouTubeUtils.download_with_api(
+                        link,
+                        progress=YouTubeUtils.answering(answer, progress),
+                        progressive=progressive.enabled and not warm,
+                        max_size=TG_AUDIO_FILESIZE_LIMIT,
+                    ),
+                    lambda answer: audio_dl(YouTubeUtils.answering(answer, progress)),
+                )
+                if dl and not warm:
+                    await mirror.record(vidid, "audio", str(dl))
+                return str(dl) if dl else None
+
+            if warm:
+                downloaded_file = await flights.run(
+                    (vidid, "audio", PROFILE, "warm"), fetch_audio, mystic, token
+                )
+            else:
+                downloaded_file = await progressive.run(
+                    (vidid, "audio", PROFILE), fetch_audio, mystic, token
+                )
         return downloaded_file, direct
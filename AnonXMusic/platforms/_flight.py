@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.database import get_lang
+from AnonXMusic.utils.formatters import convert_bytes, get_readable_time
+from strings import get_string
+
+Progress = Callable[..., None]
+
+
+class DownloadCancelled(Exception):
+    """The shared download was cancelled because no queue entry needs it anymore."""
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.task: Optional[asyncio.Task] = None
+        self.watchers: list[tuple[Any, dict]] = []
+        self.started = time.time()
+        self.current = 0
+        self.total = 0
+        self.last_edit = 0.0
+        self.owners: set = set()
+        self.pinned = False
+
+
+class DownloadFlights:
+    """
+    Process-wide single-flight map for downloads. Concurrent callers asking
+    for the same key await one shared task, and every caller's status
+    message is kept updated with its progress. Callers passing a cancel
+    token own the download; it is aborted once every owner has cancelled
+    and no caller without a token is waiting on it.
+    """
+
+    PROGRESS_INTERVAL = 5
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+        self._watchers: list[Callable[[Hashable], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def keys(self) -> list[Hashable]:
+        return list(self._flights)
+
+    def watch(self, callback: Callable[[Hashable], None]) -> Callable[[], None]:
+        """Call `callback(key)` whenever a new download starts; returns the unsubscriber."""
+        self._watchers.append(callback)
+        return lambda: self._watchers.remove(callback)
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[Progress], Awaitable[Any]],
+        mystic=None,
+        token=None,
+    ) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(
+                factory(lambda current, total, *_: self._progress(flight, current, total))
+            )
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            for callback in list(self._watchers):
+                callback(key)
+        else:
+            LOGGER(__name__).info("Joining in-flight download for %s", key)
+        if token is None:
+            flight.pinned = True
+        else:
+            flight.owners.add(token)
+            token.on_cancel(lambda: self._release(key, flight, token))
+        if mystic:
+            flight.watchers.append((mystic, get_string(await get_lang(mystic.chat.id))))
+        # A caller giving up must not cancel the download for everyone else
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.task.cancelled():
+                raise DownloadCancelled(f"Download of {key} was cancelled")
+            raise
+
+    def _release(self, key: Hashable, flight: _Flight, token) -> None:
+        flight.owners.discard(token)
+        if flight.owners or flight.pinned or flight.task.done():
+            return
+        LOGGER(__name__).info("Cancelling download of %s, no queue entry needs it", key)
+        flight.task.cancel()
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        flight.watchers.clear()
+        if self._flights.get(key) is flight:
+            self._flights.pop(key, None)
+
+    def _progress(self, flight: _Flight, current: int, total: int) -> None:
+        flight.current, flight.total = current, total
+        now = time.time()
+        if not total or now - flight.last_edit < self.PROGRESS_INTERVAL:
+            return
+        flight.last_edit = now
+        asyncio.create_task(self._broadcast(flight))
+
+    async def _broadcast(self, flight: _Flight) -> None:
+        from AnonXMusic import app
+
+        current, total = flight.current, flight.total
+        elapsed = max(time.time() - flight.started, 1e-3)
+        speed = current / elapsed
+        eta = get_readable_time(int((total - current) / speed)) if speed else None
+        for mystic, _ in list(flight.watchers):
+            try:
+                await mystic.edit_text(
+                    _["tg_1"].format(
+                        app.mention,
+                        convert_bytes(total),
+                        convert_bytes(current),
+                        str(round(current * 100 / total, 2))[:5],
+                        convert_bytes(speed),
+                        eta or "0 sᴇᴄᴏɴᴅs",
+                    )
+                )
+            except Exception:
+                pass
+
+
+flights = DownloadFlights()
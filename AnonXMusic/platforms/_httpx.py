@@ -3,20 +3,35 @@
 #  Part of the TgMusicBot project. All rights reserved where applicable.
 
 import asyncio
+import json
 import re
 import time
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Callable, Optional, Union
 from urllib.parse import unquote, urlparse, parse_qs, urlencode, urlunparse
 
 import aiofiles
 import httpx
 
-from config import DOWNLOADS_DIR, API_KEY, API_URL
+from config import (
+    DOWNLOADS_DIR,
+    API_KEY,
+    API_URL,
+    DOWNLOAD_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+)
 from AnonXMusic.logging import LOGGER
 
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 @dataclass
 class DownloadResult:
@@ -28,15 +43,22 @@ class DownloadResult:
 class HttpxClient:
     DEFAULT_TIMEOUT = 120
     DEFAULT_DOWNLOAD_TIMEOUT = 120
-    CHUNK_SIZE = 8192
+    CHUNK_SIZE = 65536
+    WRITE_BUFFER = 1 << 20
+    MIN_SEGMENT = 4 << 20
     MAX_RETRIES = 2
     BACKOFF_FACTOR = 1.0
 
+    # Long-lived clients shared process-wide, one per scheme://host
+    _shared: dict[str, "HttpxClient"] = {}
+
     def __init__(
         self,
         timeout: int = DEFAULT_TIMEOUT,
         download_timeout: int = DEFAULT_DOWNLOAD_TIMEOUT,
         max_redirects: int = 1,
+        max_connections: Optional[int] = None,
+        http2: bool = False,
     ) -> None:
         self._timeout = timeout
         self._download_timeout = download_timeout
@@ -48,10 +70,37 @@ class HttpxClient:
                 write=self._timeout,
                 pool=self._timeout,
             ),
+            limits=httpx.Limits(
+                max_connections=max_connections or 100,
+                max_keepalive_connections=max_connections or 20,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=http2 and HTTP2_AVAILABLE,
             follow_redirects=max_redirects > 1,
             max_redirects=max_redirects,
         )
 
+    @classmethod
+    def shared(cls, url: str) -> "HttpxClient":
+        """
+        Return the shared client for the host of `url`, creating it on first use.
+        Each host gets its own connection limit and keeps connections warm.
+        """
+        parsed = urlparse(url)
+        key = f"{parsed.scheme}://{parsed.netloc}"
+        client = cls._shared.get(key)
+        if client is None or client._session.is_closed:
+            client = cls(max_connections=HTTP_MAX_CONNECTIONS_PER_HOST, http2=True)
+            cls._shared[key] = client
+        return client
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close every shared client; called on shutdown."""
+        clients, cls._shared = list(cls._shared.values()), {}
+        for client in clients:
+            await client.close()
+
     async def close(self) -> None:
         try:
             await self._session.aclose()
@@ -84,52 +133,225 @@ class HttpxClient:
         url: str,
         file_path: Optional[Union[str, Path]] = None,
         overwrite: bool = False,
+        progress: Optional[Callable[..., None]] = None,
+        suffix: Optional[str] = None,
+        progressive: bool = False,
+        max_size: int = 0,
         **kwargs: Any,
     ) -> DownloadResult:
         """
         Download a file asynchronously using httpx, saving to DOWNLOADS_DIR by default.
+        When the server honours Range requests the file is fetched over several
+        connections into a preallocated `.part` file that survives failures and
+        is resumed on the next call. With `progressive` the body is written in
+        order straight to the final path so it can be played while it grows.
+        Files the server reports as larger than `max_size` are not fetched.
+        `progress` is called with (downloaded, total, path).
         """
         if not url:
             return DownloadResult(success=False, error="Empty URL provided")
 
         url = self._append_api_key(url)
         headers = kwargs.pop("headers", {})
+        path = part = None
         try:
+            # Probe with a one-byte range: 206 means ranged/resumable, 200 means stream as-is
             async with self._session.stream(
-                "GET", url, timeout=self._download_timeout, headers=headers
+                "GET",
+                url,
+                timeout=self._download_timeout,
+                headers={**headers, "Range": "bytes=0-0"},
             ) as response:
                 response.raise_for_status()
+                path = self._target_path(response, url, file_path)
+                if suffix and path.suffix != suffix:
+                    path = path.with_suffix(suffix)
 
-                if file_path is None:
-                    cd = response.headers.get("Content-Disposition", "")
-                    match = re.search(r'filename="?([^"]+)"?', cd)
-                    filename = (
-                        unquote(match[1])
-                        if match
-                        else Path(urlparse(url).path).name or f"{uuid.uuid4().hex}.bin"
-                    )
-                    path = Path(DOWNLOADS_DIR) / filename
+                if response.status_code == 206:
+                    content_range = response.headers.get("Content-Range", "")
+                    total = int(content_range.rsplit("/", 1)[-1]) if "/" in content_range else 0
                 else:
-                    path = Path(file_path) if isinstance(file_path, str) else file_path
+                    total = int(response.headers.get("Content-Length", 0))
 
-                if path.exists() and not overwrite:
+                if not overwrite and self._is_complete(path, total):
                     LOGGER(__name__).debug("File already exists: %s", path)
                     return DownloadResult(success=True, file_path=path)
 
                 path.parent.mkdir(parents=True, exist_ok=True)
+                part = path if progressive else path.with_name(path.name + ".part")
+                if max_size and total > max_size:
+                    return DownloadResult(
+                        success=False, error=f"{url} is {total} bytes, limit is {max_size}"
+                    )
+                if response.status_code != 206:
+                    await self._stream_body(response, part, progress, total)
 
-                async with aiofiles.open(path, "wb") as f:
-                    async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
-                        await f.write(chunk)
+            if response.status_code == 206 and total and not progressive:
+                await self._download_ranges(url, headers, part, total, progress)
+            elif response.status_code == 206:
+                async with self._session.stream(
+                    "GET", url, timeout=self._download_timeout, headers=headers
+                ) as response:
+                    response.raise_for_status()
+                    await self._stream_body(response, part, progress, total)
 
-                LOGGER(__name__).debug("Successfully downloaded file to %s", path)
-                return DownloadResult(success=True, file_path=path)
+            size = part.stat().st_size
+            if total and size != total:
+                if progressive:
+                    part.unlink(missing_ok=True)
+                return DownloadResult(
+                    success=False, error=f"Size mismatch for {url}: {size} != {total}"
+                )
+            if part != path:
+                part.replace(path)
+            LOGGER(__name__).debug("Successfully downloaded file to %s", path)
+            return DownloadResult(success=True, file_path=path)
 
+        except asyncio.CancelledError:
+            # Cancelled by its queue entry: nothing will resume it, drop the partial data
+            if part is not None:
+                part.unlink(missing_ok=True)
+                part.with_name(part.name + ".json").unlink(missing_ok=True)
+            raise
         except Exception as e:
+            # A progressive download writes to the final path; never leave it truncated
+            if progressive and path is not None:
+                path.unlink(missing_ok=True)
             error_msg = self._handle_http_error(e, url)
             LOGGER(__name__).error(error_msg)
             return DownloadResult(success=False, error=error_msg)
 
+    @staticmethod
+    def _is_complete(path: Path, total: int) -> bool:
+        """Whether `path` is a finished download rather than one cut short."""
+        if not path.exists():
+            return False
+        if total:
+            return path.stat().st_size == total
+        # Size unknown: only trust it when no resumable download is pending for it
+        return not path.with_name(path.name + ".part.json").exists()
+
+    @staticmethod
+    def _target_path(
+        response: httpx.Response, url: str, file_path: Optional[Union[str, Path]]
+    ) -> Path:
+        if file_path is not None:
+            return Path(file_path) if isinstance(file_path, str) else file_path
+        cd = response.headers.get("Content-Disposition", "")
+        match = re.search(r'filename="?([^"]+)"?', cd)
+        filename = (
+            unquote(match[1])
+            if match
+            else Path(urlparse(url).path).name or f"{uuid.uuid4().hex}.bin"
+        )
+        return Path(DOWNLOADS_DIR) / filename
+
+    async def _stream_body(
+        self,
+        response: httpx.Response,
+        part: Path,
+        progress: Optional[Callable[..., None]],
+        total: int,
+    ) -> None:
+        """Write a whole (non-ranged) response body to `part` with large buffered writes."""
+        written = 0
+        buffer = bytearray()
+        async with aiofiles.open(part, "wb") as f:
+            async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
+                buffer += chunk
+                if len(buffer) >= self.WRITE_BUFFER:
+                    await f.write(bytes(buffer))
+                    await f.flush()
+                    written += len(buffer)
+                    buffer.clear()
+                    if progress:
+                        progress(written, total, str(part))
+            if buffer:
+                await f.write(bytes(buffer))
+                written += len(buffer)
+        if progress:
+            progress(written, total, str(part))
+
+    async def _download_ranges(
+        self,
+        url: str,
+        headers: dict,
+        part: Path,
+        total: int,
+        progress: Optional[Callable[..., None]],
+    ) -> None:
+        """Fetch `total` bytes as parallel ranges into `part`, resuming from its sidecar."""
+        meta_path = part.with_name(part.name + ".json")
+        segments = None
+        if part.exists() and meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text())
+                if meta.get("size") == total and part.stat().st_size == total:
+                    segments = meta["segments"]
+                    LOGGER(__name__).info("Resuming %s", part)
+            except Exception:
+                segments = None
+        if segments is None:
+            count = max(1, min(DOWNLOAD_CONNECTIONS, total // self.MIN_SEGMENT))
+            step = -(-total // count)
+            # [start, end (inclusive), bytes already written]
+            segments = [
+                [start, min(start + step, total) - 1, 0] for start in range(0, total, step)
+            ]
+            with open(part, "wb") as f:
+                f.truncate(total)
+
+        def save_meta() -> None:
+            meta_path.write_text(json.dumps({"size": total, "segments": segments}))
+
+        def report() -> None:
+            if progress:
+                progress(sum(seg[2] for seg in segments), total, str(part))
+
+        async def fetch(seg: list) -> None:
+            for attempt in range(self.MAX_RETRIES + 1):
+                start, end, done = seg
+                if start + done > end:
+                    return
+                try:
+                    async with self._session.stream(
+                        "GET",
+                        url,
+                        timeout=self._download_timeout,
+                        headers={**headers, "Range": f"bytes={start + done}-{end}"},
+                    ) as response:
+                        response.raise_for_status()
+                        if response.status_code != 206:
+                            raise httpx.HTTPError("Server ignored the Range header")
+                        buffer = bytearray()
+                        async with aiofiles.open(part, "r+b") as f:
+                            await f.seek(start + done)
+                            async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
+                                buffer += chunk
+                                if len(buffer) >= self.WRITE_BUFFER:
+                                    await f.write(bytes(buffer))
+                                    seg[2] += len(buffer)
+                                    buffer.clear()
+                                    save_meta()
+                                    report()
+                            if buffer:
+                                await f.write(bytes(buffer))
+                                seg[2] += len(buffer)
+                    save_meta()
+                    report()
+                    return
+                except (httpx.TransportError, httpx.HTTPError):
+                    save_meta()
+                    if attempt == self.MAX_RETRIES:
+                        raise
+                    await asyncio.sleep(self.BACKOFF_FACTOR * (2**attempt))
+
+        save_meta()
+        await asyncio.gather(*(fetch(seg) for seg in segments))
+        if sum(seg[2] for seg in segments) != total:
+            raise httpx.HTTPError(f"Incomplete ranged download: {part}")
+        meta_path.unlink(missing_ok=True)
+
     async def make_request(
         self,
         url: str,
@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import re
+import time
+from typing import Optional
+
+from AnonXMusic.logging import LOGGER
+from config import SEARCH_INDEX_SIZE
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", (text or "").casefold()).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrackIndex:
+    """
+    On-disk search index of tracks the bot has already resolved on YouTube.
+    Each track is indexed by the trigrams of its title, channel, artist
+    metadata and the queries that found it, so a repeated `/play <query>`
+    resolves locally instead of scraping a search page. Only confident
+    matches are returned; anything else falls through to a network search.
+    """
+
+    INDEX_PATH = os.path.join("cache", ".track_index.json")
+    SAVE_INTERVAL = 60
+    MIN_QUERY = 4
+    # Share of the query's trigrams a track must contain
+    THRESHOLD = 0.9
+    # A single misspelt word is tolerated above this share
+    TYPO_THRESHOLD = 0.95
+    ALIASES = 5
+
+    def __init__(self, size: int = SEARCH_INDEX_SIZE) -> None:
+        self.size = size
+        self._tracks: dict[str, dict] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._tokens: dict[str, set[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._loaded = False
+        self._dirty = False
+        self._saved = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def load(self) -> None:
+        self._loaded = True
+        try:
+            with open(self.INDEX_PATH, "r", encoding="utf-8") as f:
+                tracks = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            LOGGER(__name__).warning("Track index is unreadable, starting fresh: %s", e)
+            return
+        for vidid, track in tracks.items():
+            self._tracks[vidid] = track
+            self._reindex(vidid)
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.INDEX_PATH), exist_ok=True)
+            tmp = self.INDEX_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._tracks, f)
+            os.replace(tmp, self.INDEX_PATH)
+            self._dirty = False
+            self._saved = time.monotonic()
+        except Exception as e:
+            LOGGER(__name__).warning("Failed to save track index: %s", e)
+
+    def _unindex(self, vidid: str) -> None:
+        for gram in self._grams.pop(vidid, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(vidid)
+                if not posting:
+                    del self._postings[gram]
+        self._tokens.pop(vidid, None)
+
+    def _reindex(self, vidid: str) -> None:
+        self._unindex(vidid)
+        grams: set[str] = set()
+        tokens: set[str] = set()
+        for text in self._tracks[vidid]["text"]:
+            text = normalize(text)
+            grams |= trigrams(text)
+            tokens.update(text.split())
+        self._grams[vidid] = grams
+        self._tokens[vidid] = tokens
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(vidid)
+
+    def add(
+        self,
+        details: dict,
+        channel: str = "",
+        artist: str = "",
+        query: Optional[str] = None,
+    ) -> None:
+        """Index a resolved track (the dict returned by `track()`) under its metadata and query."""
+        if not self._loaded:
+            self.load()
+        vidid = details.get("vidid")
+        if not vidid or not details.get("title"):
+            return
+        track = self._tracks.get(vidid)
+        if track is None:
+            track = self._tracks[vidid] = {"details": {}, "text": [], "hits": 0}
+        track["details"] = {
+            key: details.get(key) for key in ("title", "link", "vidid", "duration_min", "thumb")
+        }
+        track["hits"] += 1
+        texts = [details["title"], channel, artist] + track["text"][3:]
+        if query and not query.startswith(("http://", "https://")):
+            query = query.strip()
+            if query not in texts[3:]:
+                texts.insert(3, query)
+        track["text"] = texts[: 3 + self.ALIASES]
+        self._reindex(vidid)
+        if len(self._tracks) > self.size:
+            self._evict()
+        self._dirty = True
+        if time.monotonic() - self._saved > self.SAVE_INTERVAL:
+            self.save()
+
+    def _evict(self) -> None:
+        excess = len(self._tracks) - self.size
+        for vidid in sorted(self._tracks, key=lambda v: self._tracks[v]["hits"])[:excess]:
+            self._unindex(vidid)
+            del self._tracks[vidid]
+
+    def search(self, query: str) -> Optional[dict]:
+        """Return the details of a confident match for `query`, or None."""
+        if not self._loaded:
+            self.load()
+        text = normalize(query)
+        if len(text) < self.MIN_QUERY or not self._tracks:
+            return None
+        grams = trigrams(text)
+        needed = math.ceil(len(grams) * self.THRESHOLD)
+        # A match holds `needed` query trigrams, so it is posted under one of the rarest few
+        rarest = sorted(grams, key=lambda g: len(self._postings.get(g, ())))
+        candidates: set[str] = set()
+        for gram in rarest[: len(grams) - needed + 1]:
+            candidates |= self._postings.get(gram, set())
+
+        words = text.split()
+        best, best_key = None, None
+        for vidid in candidates:
+            doc = self._grams[vidid]
+            shared = len(grams & doc)
+            if shared < needed:
+                continue
+            share = shared / len(grams)
+            missing = sum(1 for word in words if word not in self._tokens[vidid])
+            if missing > 1 or (missing and share < self.TYPO_THRESHOLD):
+                continue
+            exact = any(normalize(t) == text for t in self._tracks[vidid]["text"])
+            key = (
+                -missing,
+                exact,
+                round(share, 2),
+                shared / len(doc) + 0.1 * math.log1p(self._tracks[vidid]["hits"]),
+            )
+            if best_key is None or key > best_key:
+                best, best_key = vidid, key
+        if best is None:
+            return None
+        return dict(self._tracks[best]["details"])
+
+
+track_index = TrackIndex()
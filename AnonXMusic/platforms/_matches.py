@@ -0,0 +1,239 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from youtubesearchpython.__future__ import VideosSearch
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.platforms._index import normalize, track_index
+from AnonXMusic.utils.database import get_match, save_match
+from AnonXMusic.utils.formatters import seconds_to_min, time_to_seconds
+
+Search = Callable[[str], Awaitable[list]]
+
+
+# Concurrent playlist matching shares a few search slots so YouTube doesn't throttle us
+_searching = asyncio.Semaphore(4)
+
+
+async def _search(query: str) -> list:
+    async with _searching:
+        search = VideosSearch(query, limit=TrackMatcher.CANDIDATES)
+        return (await search.next()).get("result") or []
+
+
+def unresolved(
+    provider: str,
+    track_id: Optional[str],
+    query: str,
+    title: Optional[str] = None,
+    duration: int = 0,
+    artist: str = "",
+    **extra,
+) -> dict:
+    """
+    A playlist track queued as a reference and matched to YouTube only once
+    it nears the head of the queue (see `utils.stream.lazy`). Carries the
+    provider's title and duration for /queue in the meantime.
+    """
+    return {
+        "title": title or query,
+        "duration_min": seconds_to_min(duration) if duration else None,
+        "lazy": {
+            "provider": provider,
+            "id": track_id,
+            "query": query,
+            "artist": artist,
+            "duration": duration,
+        },
+        **extra,
+    }
+
+
+class TrackMatcher:
+    """
+    Persistent map from Spotify / Apple Music / Resso tracks to the YouTube
+    video that plays them. Matches are stored under the provider's track id
+    and under the normalised "title artist", with a confidence from title
+    and duration agreement. Weak matches are searched again once they are
+    older than REMATCH_AFTER; everything else resolves without a search.
+    A track with no stored match is looked up in the local track index
+    (fuzzy, by "title artist") before YouTube is searched.
+    """
+
+    CANDIDATES = 5
+    # Matches below this confidence are re-searched after REMATCH_AFTER seconds
+    MIN_CONFIDENCE = 0.6
+    REMATCH_AFTER = 7 * 86400
+    # Seconds of duration difference that count as a complete mismatch
+    DURATION_SLACK = 30
+
+    def __init__(self) -> None:
+        self._searchers: dict[str, Search] = {}
+
+    def register(self, provider: str, search: Search) -> None:
+        """Use `search` instead of the default YouTube search for a provider's tracks."""
+        self._searchers[provider] = search
+
+    @staticmethod
+    def _keys(provider: str, track_id: Optional[str], query: str) -> list[str]:
+        keys = [f"{provider}:{track_id}"] if track_id else []
+        if text := normalize(query):
+            keys.append(f"q:{text}")
+        return keys
+
+    def _fresh(self, entry: dict) -> bool:
+        if not entry.get("vidid"):
+            return False
+        if entry.get("confidence", 0) >= self.MIN_CONFIDENCE:
+            return True
+        return time.time() - entry.get("matched", 0) < self.REMATCH_AFTER
+
+    def _score(self, result: dict, words: set[str], duration: int) -> float:
+        text = normalize(f'{result.get("title", "")} {(result.get("channel") or {}).get("name", "")}')
+        found = set(text.split())
+        title = len(words & found) / len(words) if words else 0
+        if not duration or not result.get("duration"):
+            return title
+        gap = abs(int(time_to_seconds(result["duration"])) - duration)
+        return 0.6 * title + 0.4 * max(0.0, 1 - gap / self.DURATION_SLACK)
+
+    async def match(
+        self,
+        provider: str,
+        track_id: Optional[str],
+        query: str,
+        duration: int = 0,
+        artist: str = "",
+        search: Optional[Search] = None,
+    ) -> Optional[dict]:
+        """
+        Return track details (title, link, vidid, duration_min, thumb) for an
+        external track, searching YouTube only on a miss or a stale weak match.
+        """
+        keys = self._keys(provider, track_id, query)
+        for key in keys:
+            entry = await get_match(key)
+            if self._fresh(entry):
+                if key != keys[0]:
+                    await save_match(keys[0], entry)
+                return self._details(entry)
+
+        if (indexed := self._indexed(query, duration)) is not None:
+            for key in keys:
+                await save_match(key, indexed)
+            return self._details(indexed)
+
+        results = await (search or self._searchers.get(provider, _search))(query)
+        if not results:
+            return None
+        words = set(normalize(query).split())
+        scored = [(self._score(r, words, duration), i, r) for i, r in enumerate(results)]
+        # Ties go to the search engine's own ranking
+        confidence, _, best = max(scored, key=lambda s: (round(s[0], 2), -s[1]))
+        entry = {
+            "vidid": best["id"],
+            "title": best["title"],
+            "link": best["link"],
+            "duration_min": best.get("duration"),
+            "thumb": best["thumbnails"][0]["url"].split("?")[0] if best.get("thumbnails") else None,
+            "confidence": round(confidence, 3),
+            "matched": int(time.time()),
+        }
+        if confidence < self.MIN_CONFIDENCE:
+            LOGGER(__name__).info(
+                "Weak match for %r: %s (%.2f)", query, best["id"], confidence
+            )
+        for key in keys:
+            await save_match(key, entry)
+        details = self._details(entry)
+        track_index.add(details, artist=artist, query=query)
+        return details
+
+    def _indexed(self, query: str, duration: int) -> Optional[dict]:
+        """A stored match built from the track index's hit for `query`, unless its duration disagrees."""
+        details = track_index.search(query)
+        if not details or not details.get("vidid"):
+            return None
+        if duration and details.get("duration_min"):
+            gap = abs(int(time_to_seconds(details["duration_min"])) - duration)
+            if gap > self.DURATION_SLACK:
+                return None
+        return {
+            **details,
+            # The index only answers confident matches
+            "confidence": self.MIN_CONFIDENCE,
+            "matched": int(time.time()),
+        }
+
+    @staticmethod
+    def _details(entry: dict) -> dict:
+        return {key: entry.get(key) for key in ("title", "link", "vidid", "duration_min", "thumb")}
+
+
+matcher = TrackMatcher()
+
+
+class ResolvingTracks:
+    """
+    Tracks of a playlist whose YouTube matches resolve concurrently.
+    `async for` yields them in playlist order as each one is ready, so the
+    first track can start playing while the rest are still being matched.
+    `len()`, truth and indexing only see the leading tracks resolved so
+    far. Items that are not coroutines (e.g. `unresolved` references) are
+    passed through as is.
+    """
+
+    def __init__(self, items: list) -> None:
+        self._tasks = [self._future(item) for item in items]
+        for task in self._tasks:
+            task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _future(item) -> asyncio.Future:
+        if asyncio.iscoroutine(item):
+            return asyncio.ensure_future(item)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(item)
+        return future
+
+    def __len__(self) -> int:
+        return len(self.resolved())
+
+    def __bool__(self) -> bool:
+        return bool(self.resolved())
+
+    def __getitem__(self, index):
+        return self.resolved()[index]
+
+    def resolved(self) -> list:
+        tracks = []
+        for task in self._tasks:
+            if not task.done():
+                break
+            if not task.cancelled() and task.exception() is None and task.result():
+                tracks.append(task.result())
+        return tracks
+
+    async def first(self) -> None:
+        """Wait until the first playable track is resolved (or all failed)."""
+        async for _ in self:
+            return
+
+    async def __aiter__(self):
+        for task in self._tasks:
+            try:
+                track = await asyncio.shield(task)
+            except Exception:
+                continue
+            if track:
+                yield track
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    @staticmethod
+    def _log_failure(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER(__name__).info("Track match failed: %s", task.exception())
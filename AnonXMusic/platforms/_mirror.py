@@ -0,0 +1,105 @@
+import asyncio
+import os
+from typing import Callable, Optional
+
+from config import (
+    DOWNLOADS_DIR,
+    MIRROR_MIN_PLAYS,
+    SONG_DUMP_ID,
+    TG_AUDIO_FILESIZE_LIMIT,
+    TG_VIDEO_FILESIZE_LIMIT,
+)
+from AnonXMusic.core.transfers import BULK, PLAYBACK, transfers
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.database import delete_mirror, get_mirror, update_mirror
+
+
+class TelegramMirror:
+    """
+    Mirrors popular downloads into the SONG_DUMP_ID channel and keeps a
+    (video id, kind) -> (file_id, message id) index, so later plays are
+    fetched from Telegram's CDN instead of being extracted from YouTube.
+    """
+
+    UPLOADS = 2
+
+    def __init__(self, chat_id: int = SONG_DUMP_ID, min_plays: int = MIRROR_MIN_PLAYS) -> None:
+        self.chat_id = chat_id
+        self.min_plays = min_plays
+        self._uploading: set[tuple[str, str]] = set()
+        self._semaphore = asyncio.Semaphore(self.UPLOADS)
+
+    async def fetch(
+        self, vidid: str, kind: str, progress: Optional[Callable[..., None]] = None
+    ) -> Optional[str]:
+        """Return a local path for a mirrored track, downloading it from Telegram if needed."""
+        from AnonXMusic import app
+
+        entry = await get_mirror(vidid, kind)
+        if not entry.get("file_id"):
+            return None
+        path = os.path.join(os.path.realpath(DOWNLOADS_DIR), entry["file_name"])
+        if os.path.isfile(path):
+            return path
+        with transfers.priority(PLAYBACK):
+            return await self._download(vidid, kind, entry, path, progress)
+
+    async def _download(self, vidid, kind, entry, path, progress) -> Optional[str]:
+        from AnonXMusic import app
+
+        try:
+            return await app.download_media(entry["file_id"], file_name=path, progress=progress)
+        except Exception as e:
+            LOGGER(__name__).info("Mirror file_id for %s failed (%s), refetching message", vidid, e)
+        try:
+            message = await app.get_messages(self.chat_id, entry["message_id"])
+            if message and message.media:
+                return await message.download(file_name=path, progress=progress)
+        except Exception as e:
+            LOGGER(__name__).warning("Mirror message for %s is unavailable: %s", vidid, e)
+        await delete_mirror(vidid, kind)
+        return None
+
+    async def record(self, vidid: str, kind: str, path: Optional[str]) -> None:
+        """Count a download and mirror the file once it has become popular."""
+        if not path or not os.path.isfile(path):
+            return
+        entry = await get_mirror(vidid, kind)
+        plays = entry.get("plays", 0) + 1
+        await update_mirror(vidid, kind, {"plays": plays})
+        if entry.get("file_id") or plays < self.min_plays or (vidid, kind) in self._uploading:
+            return
+        limit = TG_VIDEO_FILESIZE_LIMIT if kind == "video" else TG_AUDIO_FILESIZE_LIMIT
+        if os.path.getsize(path) > limit:
+            return
+        self._uploading.add((vidid, kind))
+        asyncio.create_task(self._upload(vidid, kind, path))
+
+    async def _upload(self, vidid: str, kind: str, path: str) -> None:
+        from AnonXMusic import app
+
+        try:
+            async with self._semaphore:
+                with transfers.priority(BULK):
+                    if kind == "video":
+                        message = await app.send_video(self.chat_id, path, caption=vidid)
+                    else:
+                        message = await app.send_audio(self.chat_id, path, caption=vidid)
+            media = getattr(message, message.media.value)
+            await update_mirror(
+                vidid,
+                kind,
+                {
+                    "file_id": media.file_id,
+                    "message_id": message.id,
+                    "file_name": os.path.basename(path),
+                },
+            )
+            LOGGER(__name__).info("Mirrored %s (%s) to the dump channel", vidid, kind)
+        except Exception as e:
+            LOGGER(__name__).warning("Failed to mirror %s: %s", vidid, e)
+        finally:
+            self._uploading.discard((vidid, kind))
+
+
+mirror = TelegramMirror()
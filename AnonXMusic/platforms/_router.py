@@ -0,0 +1,171 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from config import SOURCE_CIRCUIT_COOLDOWN, SOURCE_HEDGE_DELAY
+from AnonXMusic.logging import LOGGER
+
+# An attempt receives `answer`, to be called once it starts producing data
+Attempt = Callable[[Callable[[], None]], Awaitable[Any]]
+
+
+class _Source:
+    MIN_SAMPLES = 5
+    FAILURE_RATE = 0.5
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latencies: deque[float] = deque(maxlen=50)
+        self.outcomes: deque[bool] = deque(maxlen=20)
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    def hedge_after(self, default: float) -> float:
+        """p95 time-to-answer, or `default` until there are enough samples."""
+        if len(self.latencies) < self.MIN_SAMPLES:
+            return default
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def available(self, cooldown: float) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < cooldown:
+            return False
+        # Half-open: let a single request through to test the source
+        self.probing = True
+        return True
+
+    def release(self) -> None:
+        """A half-open probe was cancelled without an outcome; allow another."""
+        self.probing = False
+
+    def record(self, ok: bool, latency: Optional[float] = None) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            if latency is not None:
+                self.latencies.append(latency)
+            if self.opened_at is not None:
+                LOGGER(__name__).info("Circuit for %s closed", self.name)
+                self.outcomes.clear()
+            self.opened_at = None
+        elif self.probing:
+            self.opened_at = time.monotonic()
+        elif self.opened_at is None and len(self.outcomes) >= self.MIN_SAMPLES:
+            failures = self.outcomes.count(False)
+            if failures / len(self.outcomes) >= self.FAILURE_RATE:
+                LOGGER(__name__).warning(
+                    "Circuit for %s opened (%d/%d recent failures)",
+                    self.name,
+                    failures,
+                    len(self.outcomes),
+                )
+                self.opened_at = time.monotonic()
+        self.probing = False
+
+
+class SourceRouter:
+    """
+    Races download sources with hedging. The preferred source starts first;
+    if it has not answered within its p95 latency the next one starts too,
+    and the first to answer wins while the others are cancelled. Sources
+    failing at a high rate are skipped until a half-open probe succeeds.
+    """
+
+    def __init__(
+        self, hedge_delay: float = SOURCE_HEDGE_DELAY, cooldown: float = SOURCE_CIRCUIT_COOLDOWN
+    ) -> None:
+        self._hedge_delay = hedge_delay
+        self._cooldown = cooldown
+        self._sources: dict[str, _Source] = {}
+
+    def _source(self, name: str) -> _Source:
+        source = self._sources.get(name)
+        if source is None:
+            source = self._sources[name] = _Source(name)
+        return source
+
+    async def race(self, attempts: list[tuple[str, Attempt]]) -> Any:
+        """
+        Run `attempts` in preference order and return the first truthy result.
+        Raises the last error if every source failed with an exception, or
+        straight away for an error flagged `fatal` (no source could do better).
+        """
+        remaining = [a for a in attempts if self._source(a[0]).available(self._cooldown)]
+        if not remaining:
+            remaining = list(attempts)
+        running: dict[asyncio.Future, dict] = {}
+        committed: list[Optional[dict]] = [None]
+        last_error: Optional[BaseException] = None
+
+        def launch() -> dict:
+            name, attempt = remaining.pop(0)
+            state = {"name": name, "started": time.monotonic(), "latency": None}
+
+            def answer() -> None:
+                if state["latency"] is not None:
+                    return
+                state["latency"] = time.monotonic() - state["started"]
+                if committed[0] is None:
+                    committed[0] = state
+                    for other, other_state in running.items():
+                        if other_state is not state:
+                            other.cancel()
+
+            running[asyncio.ensure_future(attempt(answer))] = state
+            return state
+
+        latest = launch()
+        try:
+            while running:
+                timeout = None
+                if remaining and committed[0] is None:
+                    hedge = self._source(latest["name"]).hedge_after(self._hedge_delay)
+                    timeout = max(0.0, latest["started"] + hedge - time.monotonic())
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    LOGGER(__name__).info(
+                        "%s has not answered in time, hedging with %s",
+                        latest["name"],
+                        remaining[0][0],
+                    )
+                    latest = launch()
+                    continue
+                for task in done:
+                    state = running.pop(task)
+                    source = self._source(state["name"])
+                    if task.cancelled():
+                        source.release()
+                        continue
+                    error = task.exception()
+                    if error is None and task.result():
+                        latency = state["latency"] or time.monotonic() - state["started"]
+                        source.record(True, latency)
+                        return task.result()
+                    if error is not None and getattr(error, "fatal", False):
+                        source.record(True, time.monotonic() - state["started"])
+                        raise error
+                    if error is not None:
+                        last_error = error
+                        LOGGER(__name__).warning("Source %s failed: %s", state["name"], error)
+                    source.record(False)
+                    if committed[0] is state:
+                        committed[0] = None
+                if not running and remaining:
+                    latest = launch()
+        finally:
+            for task, state in running.items():
+                task.cancel()
+                self._source(state["name"]).release()
+            # Let the losers finish cleaning up their own files before returning
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        if last_error is not None:
+            raise last_error
+        return None
+
+
+router = SourceRouter()
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import OrderedDict
+from io import BytesIO
+from typing import Optional, Union
+
+from youtubesearchpython.__future__ import VideosSearch
+
+from AnonXMusic.core.session import session_pool
+from AnonXMusic.logging import LOGGER
+
+
+class _Entry:
+    def __init__(self, search: VideosSearch, results: list) -> None:
+        self.search = search
+        self.results = results
+        self.more = bool(results)
+        self.created = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class SearchCache:
+    """
+    LRU cache of YouTube search results keyed by the normalised query.
+    Identical searches in flight share one request, further pages are
+    fetched only when someone scrolls to them, and a query that is still
+    loading can be answered with the results of its longest cached prefix
+    (what the user had typed a moment earlier).
+    """
+
+    SIZE = 256
+    TTL = 600
+    FIRST_PAGE = 20
+    MAX_RESULTS = 60
+    MIN_PREFIX = 3
+    PHOTOS = 1024
+    # Thumbnails fetched ahead of being shown, kept until they are sent
+    WARM_PHOTOS = 64
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._photos: OrderedDict[str, str] = OrderedDict()
+        self._warm: OrderedDict[str, bytes] = OrderedDict()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.casefold().split())
+
+    def _cached(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created > self.TTL:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _prefix(self, key: str) -> Optional[_Entry]:
+        for end in range(len(key) - 1, self.MIN_PREFIX - 1, -1):
+            if entry := self._cached(key[:end].rstrip()):
+                return entry
+        return None
+
+    async def _fetch(self, key: str) -> _Entry:
+        search = VideosSearch(key, limit=self.FIRST_PAGE)
+        entry = _Entry(search, (await search.next()).get("result") or [])
+        self._entries[key] = entry
+        while len(self._entries) > self.SIZE:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def _entry(self, key: str) -> _Entry:
+        if entry := self._cached(key):
+            return entry
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _extend(self, entry: _Entry) -> None:
+        page = (await entry.search.next()).get("result") or []
+        known = {r.get("id") for r in entry.results}
+        page = [r for r in page if r.get("id") not in known]
+        entry.results.extend(page)
+        entry.more = bool(page) and len(entry.results) < self.MAX_RESULTS
+
+    async def page(self, query: str, offset: int, count: int) -> tuple[list, bool]:
+        """Results [offset, offset + count) of a search and whether more follow."""
+        entry = await self._entry(self.normalize(query))
+        async with entry.lock:
+            while len(entry.results) < offset + count and entry.more:
+                await self._extend(entry)
+        more = len(entry.results) > offset + count or entry.more
+        return entry.results[offset : offset + count], more
+
+    async def quick(
+        self, query: str, offset: int, count: int, wait: float
+    ) -> tuple[list, bool, bool]:
+        """
+        Like `page`, but if the first page is not in within `wait` seconds and
+        a prefix of the query is cached, return that instead and let the real
+        search finish in the background. Returns (results, more, complete).
+        """
+        key = self.normalize(query)
+        task = asyncio.ensure_future(self.page(key, offset, count))
+        stale = None if offset or self._cached(key) else self._prefix(key)
+        if stale is not None:
+            done, _ = await asyncio.wait({task}, timeout=wait)
+            if not done:
+                task.add_done_callback(self._log_failure)
+                return stale.results[:count], False, False
+        results, more = await task
+        return results, more, True
+
+    def prefetch(self, query: str, count: int, around: Optional[int] = None) -> None:
+        """
+        Load the first `count` results of a search in the background. With
+        `around`, also fetch the thumbnails of the results either side of that
+        index (wrapping), the ones a slider shows next.
+        """
+        asyncio.ensure_future(self._prefetch(query, count, around)).add_done_callback(
+            self._log_failure
+        )
+
+    async def _prefetch(self, query: str, count: int, around: Optional[int]) -> None:
+        results, _ = await self.page(query, 0, count)
+        if around is None or not results:
+            return
+        urls = {
+            results[i % len(results)]["thumbnails"][0]["url"].split("?")[0]
+            for i in (around - 1, around + 1)
+        }
+        await asyncio.gather(*(self._warm_photo(url) for url in urls))
+
+    async def _warm_photo(self, url: str) -> None:
+        if url in self._photos or url in self._warm:
+            return
+        async with session_pool.get().get(url) as response:
+            if response.status != 200:
+                return
+            self._warm[url] = await response.read()
+        while len(self._warm) > self.WARM_PHOTOS:
+            self._warm.popitem(last=False)
+
+    def photo(self, url: str) -> Union[str, BytesIO]:
+        """
+        Telegram file_id of a thumbnail already sent by URL, else its prefetched
+        bytes (uploaded directly instead of Telegram fetching the URL), else the
+        URL itself.
+        """
+        if url in self._photos:
+            return self._photos[url]
+        if data := self._warm.get(url):
+            photo = BytesIO(data)
+            photo.name = "thumb.jpg"
+            return photo
+        return url
+
+    def remember_photo(self, url: str, message) -> None:
+        photo = getattr(message, "photo", None)
+        if not photo:
+            return
+        self._warm.pop(url, None)
+        self._photos[url] = photo.file_id
+        self._photos.move_to_end(url)
+        while len(self._photos) > self.PHOTOS:
+            self._photos.popitem(last=False)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER(__name__).info("Background search failed: %s", task.exception())
+
+
+searches = SearchCache()
@@ -0,0 +1,107 @@
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Hashable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from config import STREAM_URL_MARGIN, STREAM_URL_TTL
+from AnonXMusic.logging import LOGGER
+
+_EXPIRE_PATH = re.compile(r"/expire/(\d+)")
+
+Resolver = Callable[[], Awaitable[Optional[str]]]
+
+
+def parse_expiry(url: str) -> Optional[float]:
+    """Read the unix expiry from a googlevideo URL (query string or HLS path form)."""
+    try:
+        query = parse_qs(urlparse(url).query)
+        if "expire" in query:
+            return float(query["expire"][0])
+        match = _EXPIRE_PATH.search(url)
+        if match:
+            return float(match.group(1))
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+class StreamURLCache:
+    """
+    Resolved direct stream URLs keyed by (video id, format selector).
+    Entries are served until `margin` seconds before the expiry embedded in
+    the URL, or `ttl` seconds when the URL carries none.
+    """
+
+    def __init__(self, margin: int = STREAM_URL_MARGIN, ttl: int = STREAM_URL_TTL) -> None:
+        self._margin = margin
+        self._ttl = ttl
+        self._entries: dict[Hashable, tuple[str, float]] = {}
+        self._refreshers: dict[Hashable, asyncio.Task] = {}
+
+    def get(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        url, expires = entry
+        if time.time() >= expires - self._margin:
+            self._entries.pop(key, None)
+            return None
+        return url
+
+    def put(self, key: Hashable, url: str) -> None:
+        now = time.time()
+        self._entries = {
+            k: v for k, v in self._entries.items() if v[1] - self._margin > now
+        }
+        self._entries[key] = (url, parse_expiry(url) or now + self._ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    async def resolve(
+        self,
+        key: Hashable,
+        resolver: Resolver,
+        keep_fresh: Optional[Callable[[], bool]] = None,
+    ) -> Optional[str]:
+        """
+        Return a cached URL or resolve a new one. With `keep_fresh`, the URL is
+        re-resolved in the background ahead of expiry for as long as the
+        predicate holds (used for live streams that stay queued for hours).
+        """
+        url = self.get(key)
+        if url is None:
+            url = await resolver()
+            if url:
+                self.put(key, url)
+        if url and keep_fresh and key not in self._refreshers:
+            self._refreshers[key] = asyncio.create_task(
+                self._refresh_loop(key, resolver, keep_fresh)
+            )
+        return url
+
+    async def _refresh_loop(
+        self, key: Hashable, resolver: Resolver, keep_fresh: Callable[[], bool]
+    ) -> None:
+        try:
+            while True:
+                entry = self._entries.get(key)
+                expires = entry[1] if entry else time.time()
+                await asyncio.sleep(max(0.0, expires - 2 * self._margin - time.time()))
+                if not keep_fresh():
+                    break
+                try:
+                    url = await resolver()
+                except Exception as e:
+                    LOGGER(__name__).warning("Refreshing stream URL for %s failed: %s", key, e)
+                    url = None
+                if url:
+                    self.put(key, url)
+                else:
+                    await asyncio.sleep(60)
+        finally:
+            self._refreshers.pop(key, None)
+
+
+url_cache = StreamURLCache()
@@ -0,0 +1,211 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+from typing import Any, Optional
+
+from config import YTDLP_TIMEOUT, YTDLP_WORKERS
+from AnonXMusic.logging import LOGGER
+from ytdlp_worker import PROFILES, AdmissionError, Progress, YtDlpError, worker_main
+
+
+class _Worker:
+    def __init__(self, ctx) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        # Files the current download announced writing, and whether it was abandoned
+        self.writing: set[str] = set()
+        self.abandoned = False
+
+    def recv(self) -> tuple:
+        """Receive one message (runs in an executor thread)."""
+        message = self.conn.recv()
+        if message[0] == "writing":
+            self.writing.add(message[1])
+        if self.abandoned:
+            self.remove_written()
+        return message
+
+    def remove_written(self) -> None:
+        """
+        Delete what an unfinished download wrote: `.part` files, fragment
+        state and, with `nopart`, the truncated file under its final name.
+        """
+        for path in list(self.writing):
+            for name in (path, path + ".ytdl"):
+                try:
+                    os.remove(name)
+                    LOGGER(__name__).info("Removed unfinished download %s", name)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.kill()
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except Exception:
+            pass
+        try:
+            self.process.kill()
+            self.process.join(timeout=1)
+        except Exception:
+            pass
+
+
+class YtDlpPool:
+    """
+    Long-lived yt-dlp worker processes holding warm YoutubeDL instances.
+    Concurrency is bounded by the number of workers; a worker that times out
+    or whose request is cancelled is killed and replaced. Workers are forked
+    from a single-threaded forkserver rather than from the bot process, whose
+    client and executor threads could leave inherited locks held in the child.
+    """
+
+    def __init__(self, workers: int = YTDLP_WORKERS, timeout: int = YTDLP_TIMEOUT) -> None:
+        self._size = max(1, workers)
+        self._timeout = timeout
+        self._ctx = multiprocessing.get_context("forkserver")
+        # yt-dlp is imported once in the server; each worker forks warm from it
+        self._ctx.set_forkserver_preload(["ytdlp_worker"])
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: set[_Worker] = set()
+        self._generation = 0
+
+    async def start(self) -> None:
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self._size):
+            self._idle.put_nowait(self._spawn())
+        LOGGER(__name__).info("Started %d yt-dlp workers", self._size)
+
+    async def stop(self) -> None:
+        if self._idle is None:
+            return
+        self._idle = None
+        for worker in list(self._workers):
+            worker.close()
+        self._workers.clear()
+
+    def reset(self) -> None:
+        """Make every worker drop its warm instances before its next request (e.g. new cookies)."""
+        self._generation += 1
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx)
+        self._workers.add(worker)
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        self._workers.discard(worker)
+
+    @staticmethod
+    def _abandon(worker: _Worker) -> None:
+        """
+        Mark a worker whose request will not complete before it is discarded
+        and remove the files its download announced, including one announced
+        by a message that is still being received.
+        """
+        worker.abandoned = True
+        worker.remove_written()
+
+    @staticmethod
+    async def _receive(worker: _Worker, progress: Optional[Progress]) -> tuple:
+        loop = asyncio.get_running_loop()
+        while True:
+            status, payload = await loop.run_in_executor(None, worker.recv)
+            if status == "writing":
+                continue
+            if status != "progress":
+                return status, payload
+            if progress:
+                progress(*payload)
+
+    async def _call(
+        self,
+        op: str,
+        url: str,
+        opts: dict,
+        timeout: Optional[float] = None,
+        progress: Optional[Progress] = None,
+    ) -> Any:
+        await self.start()
+        # The progress hook also announces the files a download writes, for cleanup
+        if progress or op == "download":
+            opts = {**opts, "report_progress": True}
+        idle = self._idle
+        worker = await idle.get()
+        worker.writing.clear()
+        try:
+            worker.conn.send((op, url, opts, self._generation))
+            status, payload = await asyncio.wait_for(
+                self._receive(worker, progress), timeout or self._timeout
+            )
+        except asyncio.TimeoutError:
+            self._abandon(worker)
+            self._discard(worker)
+            worker = self._spawn()
+            raise YtDlpError(f"yt-dlp {op} timed out for {url}")
+        except (EOFError, OSError) as e:
+            self._abandon(worker)
+            self._discard(worker)
+            worker = self._spawn()
+            raise YtDlpError(f"yt-dlp worker died: {e!r}")
+        except BaseException:
+            self._abandon(worker)
+            self._discard(worker)
+            worker = self._spawn()
+            raise
+        finally:
+            if self._idle is idle:
+                idle.put_nowait(worker)
+            else:
+                self._discard(worker)
+
+        if status == "rejected":
+            raise AdmissionError(*payload)
+        if status == "error":
+            worker.remove_written()
+            raise YtDlpError(payload)
+        return payload
+
+    async def extract(
+        self, url: str, opts: Optional[dict] = None, timeout: Optional[float] = None
+    ) -> dict:
+        """Extract info without downloading."""
+        return await self._call("extract", url, opts or {}, timeout)
+
+    async def download(
+        self,
+        url: str,
+        opts: dict,
+        timeout: Optional[float] = None,
+        progress: Optional[Progress] = None,
+    ) -> dict:
+        """Extract and download in one pass; the info dict carries the final 'filepath'."""
+        return await self._call("download", url, opts, timeout, progress)
+
+    async def stream_urls(
+        self, url: str, opts: Optional[dict] = None, timeout: Optional[float] = None
+    ) -> list[str]:
+        """Resolve direct media URLs, the equivalent of `yt-dlp -g`."""
+        return await self._call("urls", url, opts or {}, timeout)
+
+    async def flat_entries(
+        self, url: str, opts: Optional[dict] = None, timeout: Optional[float] = None
+    ) -> list[dict]:
+        """List entries (id, title, duration) of a playlist without resolving each one."""
+        opts = {"extract_flat": "in_playlist", **(opts or {})}
+        return await self._call("flat", url, opts, timeout)
+
+
+ytdlp = YtDlpPool()
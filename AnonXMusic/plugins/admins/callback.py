@@ -21,6 +21,9 @@ from AnonXMusic.utils.decorators.language import languageCB
 from AnonXMusic.utils.formatters import seconds_to_min
 from AnonXMusic.utils.inline import close_markup, stream_markup, stream_markup_timer
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.feed import playlist_feeds
+from AnonXMusic.utils.stream.lazy import lazy_queue
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import (
     BANNED_USERS,
@@ -197,6 +200,18 @@ async def del_back_playlist(client, CallbackQuery, _):
         else:
             txt = f"➻ sᴛʀᴇᴀᴍ ʀᴇ-ᴘʟᴀʏᴇᴅ 🎄\n│ \n└ʙʏ : {mention} 🥀"
         await CallbackQuery.answer()
+        await lazy_queue.head(chat_id)
+        if not check:
+            # None of the remaining tracks could be matched
+            await CallbackQuery.message.reply_text(
+                text=_["admin_6"].format(mention, CallbackQuery.message.chat.title),
+                reply_markup=close_markup(_),
+            )
+            try:
+                return await Anony.stop_stream(chat_id)
+            except:
+                return
+        playlist_feeds.refill(chat_id)
         queued = check[0]["file"]
         title = (check[0]["title"]).title()
         user = check[0]["by"]
@@ -225,7 +240,13 @@ async def del_back_playlist(client, CallbackQuery, _):
             try:
                 await Anony.skip_stream(chat_id, link, video=status, image=image)
             except:
-                return await CallbackQuery.message.reply_text(_["call_6"])
+                if n != 1:
+                    return await CallbackQuery.message.reply_text(_["call_6"])
+                n, link = await YouTube.video(videoid, True, fresh=True)
+                try:
+                    await Anony.skip_stream(chat_id, link, video=status, image=image)
+                except:
+                    return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
             img = await get_thumb(videoid)
             run = await CallbackQuery.message.reply_photo(
@@ -251,9 +272,12 @@ async def del_back_playlist(client, CallbackQuery, _):
                     mystic,
                     videoid=True,
                     video=status,
+                    token=check[0].get("token"),
                 )
             except:
                 return await mystic.edit_text(_["call_6"])
+            if direct:
+                content_cache.adopt(check[0], file_path)
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
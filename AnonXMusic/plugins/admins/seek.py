@@ -91,7 +91,20 @@ async def seek_comm(cli, message: Message, _, chat_id):
             playing[0]["streamtype"],
         )
     except:
-        return await mystic.edit_text(_["admin_26"], reply_markup=close_markup(_))
+        if "vid_" not in playing[0]["file"] or n != 1 or check:
+            return await mystic.edit_text(_["admin_26"], reply_markup=close_markup(_))
+        # A cached stream URL can be revoked before its expiry; retry with a fresh one
+        n, file_path = await YouTube.video(playing[0]["vidid"], True, fresh=True)
+        try:
+            await Anony.seek_stream(
+                chat_id,
+                file_path,
+                seconds_to_min(to_seek),
+                duration,
+                playing[0]["streamtype"],
+            )
+        except:
+            return await mystic.edit_text(_["admin_26"], reply_markup=close_markup(_))
 
     if message.command[0][-2] == "c":
         db[chat_id][0]["played"] -= duration_to_skip
@@ -9,6 +9,9 @@ from AnonXMusic.utils.database import get_loop
 from AnonXMusic.utils.decorators import AdminRightsCheck
 from AnonXMusic.utils.inline import close_markup, stream_markup
 from AnonXMusic.utils.stream.autoclear import auto_clean
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.feed import playlist_feeds
+from AnonXMusic.utils.stream.lazy import lazy_queue
 from AnonXMusic.utils.thumbnails import get_thumb
 from config import BANNED_USERS
 
@@ -89,6 +92,18 @@ async def skip(cli, message: Message, _, chat_id):
                 return await Anony.stop_stream(chat_id)
             except:
                 return
+    await lazy_queue.head(chat_id)
+    if not check:
+        # None of the remaining tracks could be matched
+        await message.reply_text(
+            text=_["admin_6"].format(message.from_user.mention, message.chat.title),
+            reply_markup=close_markup(_),
+        )
+        try:
+            return await Anony.stop_stream(chat_id)
+        except:
+            return
+    playlist_feeds.refill(chat_id)
     queued = check[0]["file"]
     title = (check[0]["title"]).title()
     user = check[0]["by"]
@@ -113,7 +128,13 @@ async def skip(cli, message: Message, _, chat_id):
         try:
             await Anony.skip_stream(chat_id, link, video=status, image=image)
         except:
-            return await message.reply_text(_["call_6"])
+            if n != 1:
+                return await message.reply_text(_["call_6"])
+            n, link = await YouTube.video(videoid, True, fresh=True)
+            try:
+                await Anony.skip_stream(chat_id, link, video=status, image=image)
+            except:
+                return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
         img = await get_thumb(videoid)
         run = await message.reply_photo(
@@ -136,9 +157,12 @@ async def skip(cli, message: Message, _, chat_id):
                 mystic,
                 videoid=True,
                 video=status,
+                token=check[0].get("token"),
             )
         except:
             return await mystic.edit_text(_["call_6"])
+        if direct:
+            content_cache.adopt(check[0], file_path)
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
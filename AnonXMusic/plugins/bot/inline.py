@@ -3,12 +3,20 @@ from pyrogram.types import (
     InlineKeyboardMarkup,
     InlineQueryResultPhoto,
 )
-from youtubesearchpython.__future__ import VideosSearch
 
 from AnonXMusic import app
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.platforms._search import searches
 from AnonXMusic.utils.inlinequery import answer
 from config import BANNED_USERS
 
+# Results per inline page
+PAGE_SIZE = 10
+# How long Telegram may reuse a complete answer for the same query
+CACHE_TIME = 300
+# How long to wait for a fresh search before answering with a cached prefix's results
+PREFIX_WAIT = 1.0
+
 
 @app.on_inline_query(~BANNED_USERS)
 async def inline_query_handler(client, query):
@@ -20,9 +28,15 @@ async def inline_query_handler(client, query):
         except:
             return
     else:
-        a = VideosSearch(text, limit=20)
-        result = (await a.next()).get("result")
-        for x in range(15):
+        offset = int(query.offset) if query.offset.isdigit() else 0
+        try:
+            result, more, complete = await searches.quick(
+                text, offset, PAGE_SIZE, PREFIX_WAIT
+            )
+        except Exception as e:
+            LOGGER(__name__).info("Inline search for %r failed: %s", text, e)
+            return
+        for x in range(len(result)):
             title = (result[x]["title"]).title()
             duration = result[x]["duration"]
             views = result[x]["viewCount"]["short"]
@@ -63,6 +77,12 @@ async def inline_query_handler(client, query):
                 )
             )
         try:
-            return await client.answer_inline_query(query.id, results=answers)
+            return await client.answer_inline_query(
+                query.id,
+                results=answers,
+                # Answers from a prefix are stand-ins; let Telegram ask again
+                cache_time=CACHE_TIME if complete else 0,
+                next_offset=str(offset + PAGE_SIZE) if complete and more else "",
+            )
         except:
             return
@@ -1,5 +1,4 @@
 import re
-import aiohttp
 import unicodedata
 from pyrogram import filters
 from pyrogram.types import (
@@ -10,6 +9,7 @@ from pyrogram.types import (
 )
 
 from AnonXMusic import app
+from AnonXMusic.core.session import session_pool
 
 # Base iTunes API
 ITUNES_API = "https://itunes.apple.com/search?term={}&entity={}&limit=5&country={}"
@@ -40,11 +40,11 @@ def normalize_query(query: str) -> str:
 async def fetch_json(url: str) -> dict:
     """Fetch JSON data from a URL."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as resp:
-                if resp.status != 200:
-                    return {}
-                return await resp.json()
+        session = session_pool.get()
+        async with session.get(url, timeout=10) as resp:
+            if resp.status != 200:
+                return {}
+            return await resp.json()
     except Exception:
         return {}
 
@@ -8,6 +8,7 @@ from pytgcalls.exceptions import NoActiveGroupCall
 import config
 from AnonXMusic import Apple, Resso, SoundCloud, Spotify, Telegram, YouTube, app
 from AnonXMusic.core.call import Anony
+from AnonXMusic.platforms._search import searches
 from AnonXMusic.utils import seconds_to_min, time_to_seconds
 from AnonXMusic.utils.channelplay import get_channeplayCB
 from AnonXMusic.utils.decorators.language import languageCB
@@ -276,9 +277,12 @@ async def play_commnd(
                 return await mystic.edit_text(_["play_3"])
         elif await Resso.valid(url):
             try:
-                details, track_id = await Resso.track(url)
+                result = await Resso.track(url)
             except:
                 return await mystic.edit_text(_["play_3"])
+            if not result:
+                return await mystic.edit_text(_["play_3"])
+            details, track_id = result
             streamtype = "youtube"
             img = details["thumb"]
             cap = _["play_10"].format(details["title"], details["duration_min"])
@@ -432,15 +436,18 @@ async def play_commnd(
                     "c" if channel else "g",
                     "f" if fplay else "d",
                 )
+                # The slider's buttons carry the query cut to 20 characters
+                YouTube.prefetch_slider(query[:20])
                 await mystic.delete()
-                await message.reply_photo(
-                    photo=details["thumb"],
+                sent = await message.reply_photo(
+                    photo=searches.photo(details["thumb"]),
                     caption=_["play_10"].format(
                         details["title"].title(),
                         details["duration_min"],
                     ),
                     reply_markup=InlineKeyboardMarkup(buttons),
                 )
+                searches.remember_photo(details["thumb"], sent)
                 return await play_logs(message, streamtype=f"Searched on Youtube")
             else:
                 buttons = track_markup(
@@ -647,44 +654,46 @@ async def slider_queries(client, CallbackQuery, _):
     what = str(what)
     rtype = int(rtype)
     if what == "F":
-        if rtype == 9:
-            query_type = 0
-        else:
-            query_type = int(rtype + 1)
+        query_type = rtype + 1
         try:
             await CallbackQuery.answer(_["playcb_2"])
         except:
             pass
-        title, duration_min, thumbnail, vidid = await YouTube.slider(query, query_type)
+        details = await YouTube.slider(query, query_type)
+        if not details:
+            return await CallbackQuery.edit_message_caption(_["play_3"])
+        title, duration_min, thumbnail, vidid, query_type = details
         buttons = slider_markup(_, vidid, user_id, query, query_type, cplay, fplay)
         med = InputMediaPhoto(
-            media=thumbnail,
+            media=searches.photo(thumbnail),
             caption=_["play_10"].format(
                 title.title(),
                 duration_min,
             ),
         )
-        return await CallbackQuery.edit_message_media(
+        edited = await CallbackQuery.edit_message_media(
             media=med, reply_markup=InlineKeyboardMarkup(buttons)
         )
+        return searches.remember_photo(thumbnail, edited)
     if what == "B":
-        if rtype == 0:
-            query_type = 9
-        else:
-            query_type = int(rtype - 1)
+        query_type = rtype - 1
         try:
             await CallbackQuery.answer(_["playcb_2"])
         except:
             pass
-        title, duration_min, thumbnail, vidid = await YouTube.slider(query, query_type)
+        details = await YouTube.slider(query, query_type)
+        if not details:
+            return await CallbackQuery.edit_message_caption(_["play_3"])
+        title, duration_min, thumbnail, vidid, query_type = details
         buttons = slider_markup(_, vidid, user_id, query, query_type, cplay, fplay)
         med = InputMediaPhoto(
-            media=thumbnail,
+            media=searches.photo(thumbnail),
             caption=_["play_10"].format(
                 title.title(),
                 duration_min,
             ),
         )
-        return await CallbackQuery.edit_message_media(
+        edited = await CallbackQuery.edit_message_media(
             media=med, reply_markup=InlineKeyboardMarkup(buttons)
         )
+        return searches.remember_photo(thumbnail, edited)
@@ -1,16 +1,105 @@
 import os
 import time
 import json
+import random
 import asyncio
-import aiohttp
+from typing import Optional
 
+from AnonXMusic.core.session import session_pool
+from AnonXMusic.logging import LOGGER
 from config import COOKIE_URL
 
+COOKIE_DIR = "AnonXMusic/assets"
 COOKIE_PATH = "AnonXMusic/assets/cookies.txt"
 TIMESTAMP_PATH = "AnonXMusic/assets/cookie_time.json"
 REFRESH_INTERVAL = 72 * 60 * 60  # 72 hours
 
 
+class CookiePool:
+    """
+    In-memory pool of cookie files with per-file health.
+    Files that hit 403s or sign-in walls are benched for a cooldown that
+    doubles with every consecutive failure; healthy files are preferred.
+    """
+
+    COOLDOWN = 30 * 60
+    MAX_COOLDOWN = 6 * 60 * 60
+
+    def __init__(self, directory: str = COOKIE_DIR):
+        self.directory = directory
+        self._stats: dict[str, dict] = {}
+        self._loaded = False
+
+    def reload(self):
+        """Rescan the cookie directory, keeping stats for files that are still there."""
+        try:
+            files = [
+                os.path.join(self.directory, f)
+                for f in os.listdir(self.directory)
+                if f.endswith(".txt")
+            ]
+        except OSError as e:
+            LOGGER(__name__).warning("Error accessing cookie directory: %s", e)
+            files = []
+        self._stats = {
+            path: self._stats.get(path)
+            or {"ok": 0, "failed": 0, "streak": 0, "benched_until": 0.0}
+            for path in files
+        }
+        self._loaded = True
+        LOGGER(__name__).info("Cookie pool loaded %d file(s)", len(files))
+
+    def reset(self, path: str):
+        """Forget the health of a file whose contents were replaced."""
+        self._stats.pop(path, None)
+        self.reload()
+
+    def choose(self) -> Optional[str]:
+        if not self._loaded:
+            self.reload()
+        if not self._stats:
+            return None
+        now = time.time()
+        healthy = [p for p, s in self._stats.items() if s["benched_until"] <= now]
+        if not healthy:
+            return min(self._stats, key=lambda p: self._stats[p]["benched_until"])
+        weights = [
+            (self._stats[p]["ok"] + 1) / (self._stats[p]["ok"] + self._stats[p]["failed"] + 2)
+            for p in healthy
+        ]
+        return random.choices(healthy, weights=weights)[0]
+
+    @staticmethod
+    def classify(error: str) -> str:
+        """Map a yt-dlp error message to 'forbidden', 'signin' or 'error'."""
+        text = error.lower()
+        if "sign in to confirm" in text or "login_required" in text or "cookies are no longer valid" in text:
+            return "signin"
+        if "403" in text or "forbidden" in text:
+            return "forbidden"
+        return "error"
+
+    def report(self, path: Optional[str], outcome: str):
+        stats = self._stats.get(path)
+        if not stats:
+            return
+        if outcome == "ok":
+            stats["ok"] += 1
+            stats["streak"] = 0
+            stats["benched_until"] = 0.0
+        elif outcome in ("forbidden", "signin"):
+            stats["failed"] += 1
+            stats["streak"] += 1
+            cooldown = min(self.COOLDOWN * 2 ** (stats["streak"] - 1), self.MAX_COOLDOWN)
+            stats["benched_until"] = time.time() + cooldown
+            LOGGER(__name__).warning(
+                "Benching cookie %s for %ds after %s", path, cooldown, outcome
+            )
+
+
+cookie_pool = CookiePool()
+
+
 def resolve_raw_cookie_url(url: str) -> str:
     """Convert Pastebin/Batbin URLs to raw endpoints if needed."""
     url = url.strip()
@@ -46,7 +135,7 @@ def _update_refresh_time():
 
 
 async def fetch_and_store_cookies(force: bool = False):
-    """Fetch cookies, save, and restart bot if refreshed."""
+    """Fetch cookies, save, and hot-reload them into the yt-dlp workers."""
     if not COOKIE_URL:
         raise EnvironmentError("⚠️ COOKIE_URL not set in env")
 
@@ -55,14 +144,14 @@ async def fetch_and_store_cookies(force: bool = False):
 
     raw_url = resolve_raw_cookie_url(COOKIE_URL)
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(raw_url) as resp:
-                if resp.status != 200:
-                    raise ConnectionError(f"Failed to fetch cookies: {resp.status}")
-                cookies = (await resp.text()).strip()
-        except Exception as e:
-            raise ConnectionError(f"⚠️ Can't fetch cookies: {e}")
+    session = session_pool.get()
+    try:
+        async with session.get(raw_url) as resp:
+            if resp.status != 200:
+                raise ConnectionError(f"Failed to fetch cookies: {resp.status}")
+            cookies = (await resp.text()).strip()
+    except Exception as e:
+        raise ConnectionError(f"⚠️ Can't fetch cookies: {e}")
 
     if not cookies.startswith("# Netscape"):
         raise ValueError("⚠️ Invalid cookie format (needs Netscape format).")
@@ -78,5 +167,16 @@ async def fetch_and_store_cookies(force: bool = False):
     except Exception as e:
         raise IOError(f"⚠️ Failed to save cookies: {e}")
 
-    # Restart bot after updating cookies
-    os.system(f"kill -9 {os.getpid()} && bash start")
+    from AnonXMusic.platforms._ytdlp import ytdlp
+
+    cookie_pool.reset(COOKIE_PATH)
+    ytdlp.reset()
+
+
+async def cookie_refresher():
+    """Re-fetch cookies every REFRESH_INTERVAL without restarting the bot."""
+    while not await asyncio.sleep(60 * 60):
+        try:
+            await fetch_and_store_cookies()
+        except Exception as e:
+            LOGGER(__name__).warning("Cookie refresh failed: %s", e)
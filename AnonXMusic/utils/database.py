@@ -1,4 +1,5 @@
 import random
+import time
 from typing import Dict, List, Union
 
 from AnonXMusic import userbot
@@ -24,6 +25,8 @@ sudoersdb = mongodb.sudoers
 usersdb = mongodb.tgusersdb
 queriesdb = mongodb.queries
 chattopdb = mongodb.chatstats
+mirrordb = mongodb.mirror
+matchdb = mongodb.matches
 
 # Shifting to memory [mongo sucks often]
 active = []
@@ -41,6 +44,8 @@ playmode = {}
 playtype = {}
 skipmode = {}
 playlist = []
+mirror = {}
+matches = {}
 
 
 async def get_assistant_number(chat_id: int) -> str:
@@ -244,15 +249,18 @@ async def get_global_tops() -> dict:
         for i in chat["vidid"]:
             counts_ = chat["vidid"][i]["spot"]
             title_ = chat["vidid"][i]["title"]
+            last_ = chat["vidid"][i].get("last", 0)
             if counts_ > 0:
                 if i not in results:
                     results[i] = {}
                     results[i]["spot"] = counts_
                     results[i]["title"] = title_
+                    results[i]["last"] = last_
                 else:
                     spot = results[i]["spot"]
                     count_ = spot + counts_
                     results[i]["spot"] = count_
+                    results[i]["last"] = max(results[i]["last"], last_)
     return results
 
 
@@ -277,6 +285,60 @@ async def update_particular_top(chat_id: int, name: str, vidid: dict):
     )
 
 
+async def record_particular_play(chat_id: int, name: str, title: str):
+    # One atomic update, so concurrent plays of the same track all count
+    await chattopdb.update_one(
+        {"chat_id": chat_id},
+        {
+            "$inc": {f"vidid.{name}.spot": 1},
+            "$set": {f"vidid.{name}.title": title, f"vidid.{name}.last": time.time()},
+        },
+        upsert=True,
+    )
+
+
+# Telegram mirror of downloaded tracks
+async def get_mirror(vidid: str, kind: str) -> dict:
+    key = f"{vidid}:{kind}"
+    entry = mirror.get(key)
+    if entry is None:
+        entry = await mirrordb.find_one({"vidid": vidid, "kind": kind}, {"_id": 0}) or {}
+        mirror[key] = entry
+    return entry
+
+
+async def update_mirror(vidid: str, kind: str, data: dict):
+    entry = await get_mirror(vidid, kind)
+    entry.update(data)
+    await mirrordb.update_one(
+        {"vidid": vidid, "kind": kind}, {"$set": data}, upsert=True
+    )
+
+
+async def delete_mirror(vidid: str, kind: str):
+    entry = await get_mirror(vidid, kind)
+    for field in ("file_id", "message_id", "file_name"):
+        entry.pop(field, None)
+    await mirrordb.update_one(
+        {"vidid": vidid, "kind": kind},
+        {"$unset": {"file_id": "", "message_id": "", "file_name": ""}},
+    )
+
+
+# Track -> YouTube match DB
+async def get_match(key: str) -> dict:
+    entry = matches.get(key)
+    if entry is None:
+        entry = await matchdb.find_one({"key": key}, {"_id": 0, "key": 0}) or {}
+        matches[key] = entry
+    return entry
+
+
+async def save_match(key: str, data: dict):
+    matches[key] = dict(data)
+    await matchdb.update_one({"key": key}, {"$set": data}, upsert=True)
+
+
 # Top User DB
 async def get_userss(chat_id: int) -> Dict[str, int]:
     ids = await userdb.find_one({"chat_id": chat_id})
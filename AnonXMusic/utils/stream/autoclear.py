@@ -1,18 +1,12 @@
-import os
-
-from config import autoclean
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.cancel import cancel_entry
 
 
 async def auto_clean(popped):
     try:
-        rem = popped["file"]
-        autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+        # Abort anything still downloading for the entry
+        cancel_entry(popped)
+        # Files stay on disk; the content cache evicts them once unpinned and over budget
+        content_cache.release(popped["file"])
     except:
         pass
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import time
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.utils.stream.progressive import progressive
+from config import CACHE_POLICY, CACHE_SIZE_LIMIT
+
+
+class ContentCache:
+    """
+    Keeps downloads/, cache/ and playback/ under a byte budget.
+    Files referenced by any queue are never evicted; everything else is
+    evicted least-recently (lru) or least-frequently (lfu) used first.
+    Access stats survive restarts so popular tracks stay on disk.
+    """
+
+    DIRECTORIES = ("downloads", "cache", "playback")
+    INDEX_PATH = os.path.join("cache", ".content_index.json")
+    CHECK_INTERVAL = 60
+
+    def __init__(self, budget: int = CACHE_SIZE_LIMIT, policy: str = CACHE_POLICY):
+        self.budget = budget
+        self.policy = policy.lower()
+        self._index: dict[str, dict] = {}
+        self._refs: dict[str, int] = {}
+        self._dirty = False
+        self.usage = 0
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.realpath(str(path))
+
+    @staticmethod
+    def _is_file(path) -> bool:
+        return bool(path) and os.path.isfile(str(path))
+
+    def load(self):
+        try:
+            with open(self.INDEX_PATH, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except FileNotFoundError:
+            self._index = {}
+        except Exception as e:
+            LOGGER(__name__).warning("Content index is unreadable, starting fresh: %s", e)
+            self._index = {}
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.INDEX_PATH), exist_ok=True)
+            tmp = self.INDEX_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp, self.INDEX_PATH)
+            self._dirty = False
+        except Exception as e:
+            LOGGER(__name__).warning("Failed to save content index: %s", e)
+
+    def touch(self, path):
+        """Record an access to a cached file."""
+        if not self._is_file(path):
+            return
+        entry = self._index.setdefault(self._key(path), {"hits": 0, "last": 0})
+        entry["hits"] += 1
+        entry["last"] = time.time()
+        self._dirty = True
+
+    def acquire(self, path):
+        """Pin a file while a queue entry refers to it."""
+        if not self._is_file(path):
+            return
+        key = self._key(path)
+        self._refs[key] = self._refs.get(key, 0) + 1
+        self.touch(path)
+
+    def release(self, path):
+        if not path:
+            return
+        key = self._key(path)
+        count = self._refs.get(key, 0) - 1
+        if count > 0:
+            self._refs[key] = count
+        else:
+            self._refs.pop(key, None)
+
+    def adopt(self, entry: dict, path):
+        """Point a queue entry at the file just downloaded for it, pinned like a queued file."""
+        if not self._is_file(path) or entry.get("file") == str(path):
+            return
+        self.release(entry.get("file"))
+        entry["file"] = str(path)
+        self.acquire(path)
+
+    def release_queue(self, queue):
+        for item in queue or []:
+            self.release(item.get("file"))
+
+    def _pinned(self) -> set:
+        from AnonXMusic.platforms._index import track_index
+
+        pinned = {key for key, count in self._refs.items() if count > 0}
+        for queue in db.values():
+            if not isinstance(queue, list):
+                continue
+            for item in queue:
+                for field in ("file", "speed_path"):
+                    if self._is_file(item.get(field)):
+                        pinned.add(self._key(item[field]))
+        pinned.add(self._key(self.INDEX_PATH))
+        pinned.add(self._key(progressive.LEDGER_PATH))
+        pinned.add(self._key(track_index.INDEX_PATH))
+        pinned.update(progressive.paths())
+        return pinned
+
+    def _scan(self) -> list[tuple[str, int, float]]:
+        files = []
+        for directory in self.DIRECTORIES:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((self._key(path), st.st_size, st.st_mtime))
+        return files
+
+    def _rank(self, key: str, mtime: float) -> tuple:
+        entry = self._index.get(key, {})
+        last = entry.get("last") or mtime
+        if self.policy == "lfu":
+            return entry.get("hits", 0), last
+        return (last,)
+
+    async def enforce(self):
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self._scan)
+        present = {key for key, _, _ in files}
+        for key in list(self._index):
+            if key not in present:
+                self._index.pop(key)
+                self._dirty = True
+
+        total = sum(size for _, size, _ in files)
+        self.usage = total
+        if total <= self.budget:
+            return
+        pinned = self._pinned()
+        candidates = sorted(
+            (f for f in files if f[0] not in pinned),
+            key=lambda f: self._rank(f[0], f[2]),
+        )
+        freed = 0
+        for key, size, _ in candidates:
+            if total - freed <= self.budget:
+                break
+            try:
+                await loop.run_in_executor(None, os.remove, key)
+            except OSError:
+                continue
+            freed += size
+            self._index.pop(key, None)
+            self._dirty = True
+        self.usage = total - freed
+        LOGGER(__name__).info(
+            "Content cache: evicted %.1f MiB (%s), %.1f MiB in use",
+            freed / 1048576,
+            self.policy,
+            (total - freed) / 1048576,
+        )
+
+    async def run(self):
+        while not await asyncio.sleep(self.CHECK_INTERVAL):
+            try:
+                await self.enforce()
+            except Exception as e:
+                LOGGER(__name__).warning("Content cache check failed: %s", e)
+            self.save()
+
+
+content_cache = ContentCache()
@@ -0,0 +1,61 @@
+from typing import Callable, Optional
+
+from AnonXMusic.logging import LOGGER
+
+# Tokens of downloads started for a chat that are not in its queue yet
+_pending: dict[int, set] = {}
+
+
+class CancelToken:
+    """
+    Owned by one queue entry (or a play request that is about to become one).
+    Cancelling it aborts the downloads it was handed to, unless another
+    entry still needs the same download.
+    """
+
+    def __init__(self, chat_id: Optional[int] = None) -> None:
+        self.chat_id = chat_id
+        self.cancelled = False
+        self._callbacks: list[Callable[[], None]] = []
+        if chat_id is not None:
+            _pending.setdefault(chat_id, set()).add(self)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        if self.cancelled:
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def attach(self) -> None:
+        """The token now belongs to a queue entry; queue cleanup will cancel it."""
+        tokens = _pending.get(self.chat_id)
+        if tokens:
+            tokens.discard(self)
+            if not tokens:
+                _pending.pop(self.chat_id, None)
+
+    def cancel(self) -> None:
+        if self.cancelled:
+            return
+        self.cancelled = True
+        self.attach()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                LOGGER(__name__).warning("Cancel callback failed: %s", e)
+
+
+def cancel_entry(entry) -> None:
+    token = entry.get("token") if isinstance(entry, dict) else None
+    if token:
+        token.cancel()
+
+
+def cancel_chat(chat_id: int, queue=None) -> None:
+    """Cancel the downloads of a whole queue plus any still being prepared for it."""
+    for entry in queue or []:
+        cancel_entry(entry)
+    for token in list(_pending.pop(chat_id, ())):
+        token.cancel()
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Optional
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.utils.stream.queue import put_reference
+from config import PLAYLIST_REFILL_AT
+
+
+class _Feed:
+    def __init__(self, cursor, original_chat_id, user_name, user_id, video) -> None:
+        self.cursor = cursor
+        self.original_chat_id = original_chat_id
+        self.user_name = user_name
+        self.user_id = user_id
+        self.video = video
+        self.task: Optional[asyncio.Task] = None
+
+
+class PlaylistFeeds:
+    """
+    Keeps a long playlist flowing into a chat's queue a page at a time.
+    Once the first page is queued, the playlist's cursor is attached to the
+    chat; whenever the queue drops below `refill_at` entries the next page is
+    fetched and queued as unresolved references. Memory and the time to the
+    first track stay the same however long the playlist is.
+    """
+
+    def __init__(self, refill_at: int = PLAYLIST_REFILL_AT) -> None:
+        self.refill_at = refill_at
+        self._feeds: dict[int, _Feed] = {}
+
+    def attach(self, chat_id, cursor, original_chat_id, user_name, user_id, video=None) -> None:
+        self.drop(chat_id)
+        if cursor is None or cursor.done:
+            return
+        self._feeds[chat_id] = _Feed(cursor, original_chat_id, user_name, user_id, video)
+        self.refill(chat_id)
+
+    def drop(self, chat_id) -> None:
+        feed = self._feeds.pop(chat_id, None)
+        if feed and feed.task:
+            feed.task.cancel()
+
+    def refill(self, chat_id) -> None:
+        """Fetch the next page in the background if the queue is running low."""
+        feed = self._feeds.get(chat_id)
+        if feed is None or (feed.task and not feed.task.done()):
+            return
+        if len(db.get(chat_id) or []) >= self.refill_at:
+            return
+        feed.task = asyncio.ensure_future(self._next_page(chat_id, feed))
+
+    async def _next_page(self, chat_id, feed: _Feed) -> None:
+        try:
+            page = await feed.cursor.next()
+        except Exception as e:
+            LOGGER(__name__).info("Fetching the next playlist page failed: %s", e)
+            page = []
+            feed.cursor.done = True
+        # The queue may have been stopped or replaced while the page loaded
+        if self._feeds.get(chat_id) is not feed or not db.get(chat_id):
+            return
+        for search in page:
+            await put_reference(
+                chat_id,
+                feed.original_chat_id,
+                search,
+                feed.user_name,
+                feed.user_id,
+                feed.video,
+            )
+        if feed.cursor.done:
+            self._feeds.pop(chat_id, None)
+
+
+playlist_feeds = PlaylistFeeds()
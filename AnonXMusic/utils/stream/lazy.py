@@ -0,0 +1,110 @@
+import asyncio
+from typing import Optional
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.misc import db
+from AnonXMusic.platforms._matches import matcher
+from AnonXMusic.utils.database import record_particular_play
+from AnonXMusic.utils.formatters import time_to_seconds
+from AnonXMusic.utils.stream.autoclear import auto_clean
+from config import DURATION_LIMIT, QUEUE_LOOKAHEAD
+
+
+class LazyQueue:
+    """
+    Resolves queue entries that were added as unresolved references
+    (provider + track id / query, see `_matches.unresolved`). An entry is
+    matched to YouTube only once it is within `lookahead` positions of the
+    head, so the tail of a long playlist costs nothing until it is about to
+    play. Until then /queue shows the provider's own title and duration.
+    """
+
+    def __init__(self, lookahead: int = QUEUE_LOOKAHEAD) -> None:
+        self.lookahead = lookahead
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    @staticmethod
+    async def lookup(ref: dict) -> Optional[dict]:
+        """Track details (title, link, vidid, duration_min, thumb) for a reference."""
+        if ref["provider"] == "youtube":
+            from AnonXMusic import YouTube
+
+            title, duration_min, _, thumb, vidid = await YouTube.details(ref["id"], True)
+            return {
+                "title": title,
+                "link": YouTube.base + vidid,
+                "vidid": vidid,
+                "duration_min": duration_min,
+                "thumb": thumb,
+            }
+        return await matcher.match(
+            ref["provider"],
+            ref.get("id"),
+            ref["query"],
+            ref.get("duration", 0),
+            artist=ref.get("artist", ""),
+        )
+
+    async def _resolve(self, chat_id, entry: dict) -> bool:
+        ref = entry.get("lazy")
+        if ref is None:
+            return True
+        if ref.get("failed"):
+            return False
+        try:
+            details = await self.lookup(ref)
+        except Exception as e:
+            LOGGER(__name__).info("Resolving %r failed: %s", entry["title"], e)
+            details = None
+        if not details or not details.get("vidid") or not details.get("duration_min"):
+            ref["failed"] = True
+            return False
+        seconds = int(time_to_seconds(details["duration_min"]))
+        if seconds > DURATION_LIMIT:
+            ref["failed"] = True
+            return False
+        # The placeholder title stays: it is the provider's own metadata
+        entry.update(
+            file=f"vid_{details['vidid']}",
+            vidid=details["vidid"],
+            dur=details["duration_min"],
+            seconds=seconds,
+        )
+        entry.pop("lazy", None)
+        asyncio.create_task(record_particular_play(chat_id, details["vidid"], entry["title"]))
+        return True
+
+    def resolve(self, chat_id, entry: dict) -> asyncio.Task:
+        """Start, or join, the resolution of a queue entry; the task yields whether it is playable."""
+        key = id(entry)
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(self._resolve(chat_id, entry))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return task
+
+    def prefetch(self, chat_id) -> None:
+        """Resolve the unresolved entries within the look-ahead window in the background."""
+        for entry in (db.get(chat_id) or [])[: self.lookahead + 1]:
+            ref = entry.get("lazy")
+            if ref and not ref.get("failed"):
+                self.resolve(chat_id, entry)
+
+    async def head(self, chat_id) -> None:
+        """
+        Resolve the entry about to play, dropping entries that can't be
+        matched, then warm up the window. The queue is left empty when none
+        of them can be; callers stop the stream in that case.
+        """
+        queue = db.get(chat_id)
+        while queue and queue[0].get("lazy"):
+            entry = queue[0]
+            if await self.resolve(chat_id, entry):
+                break
+            if queue and queue[0] is entry:
+                queue.pop(0)
+                await auto_clean(entry)
+        self.prefetch(chat_id)
+
+
+lazy_queue = LazyQueue()
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import struct
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from AnonXMusic.logging import LOGGER
+from config import PROGRESSIVE_BUFFER, PROGRESSIVE_PLAYBACK, PROGRESSIVE_STALL_TIMEOUT
+
+# Containers whose index may sit after the media data
+MP4_EXTENSIONS = (".mp4", ".m4a", ".mov", ".3gp")
+
+
+def streamable(path: str) -> Optional[bool]:
+    """
+    Whether a partially written file can be decoded from the start.
+    MP4-family files need their `moov` box before `mdat`; None means the
+    header is not on disk yet.
+    """
+    if not path.lower().endswith(MP4_EXTENSIONS):
+        return True
+    try:
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                f.seek(offset)
+                header = f.read(16)
+                if len(header) < 8:
+                    return None
+                size, kind = struct.unpack(">I4s", header[:8])
+                if kind == b"moov":
+                    return True
+                if kind == b"mdat":
+                    return False
+                if size == 1:
+                    if len(header) < 16:
+                        return None
+                    size = struct.unpack(">Q", header[8:16])[0]
+                if size < 8:
+                    return False
+                offset += size
+    except OSError:
+        return None
+
+
+class _Growing:
+    def __init__(self) -> None:
+        self.ready = asyncio.Event()
+        self.path: Optional[str] = None
+        self.paths: set[str] = set()
+        self.checked = 0
+        self.fallback = False
+
+
+class ProgressiveFiles:
+    """
+    Lets playback start on a download before it finishes. Downloaders report
+    (downloaded, total, path); once `buffer` bytes of a streamable container
+    are on disk, callers get the growing path while the download carries on.
+    Files still being written are tracked in a ledger so a crash never leaves
+    a truncated file that looks complete.
+    """
+
+    LEDGER_PATH = os.path.join("cache", ".progressive.json")
+
+    def __init__(
+        self,
+        enabled: bool = PROGRESSIVE_PLAYBACK,
+        buffer: int = PROGRESSIVE_BUFFER,
+        stall_timeout: int = PROGRESSIVE_STALL_TIMEOUT,
+    ) -> None:
+        self.enabled = enabled
+        self.buffer = buffer
+        self.stall_timeout = stall_timeout
+        self._pending: dict[Hashable, _Growing] = {}
+        self._growing: set[str] = set()
+        self._done: dict[str, dict[Hashable, Callable[[bool], None]]] = {}
+
+    def paths(self) -> set[str]:
+        return set(self._growing)
+
+    def is_growing(self, path) -> bool:
+        return bool(path) and os.path.realpath(str(path)) in self._growing
+
+    def when_done(self, path, key: Hashable, callback: Callable[[bool], None]) -> None:
+        """
+        Call `callback(ok)` once `path` stops growing; a later registration
+        under the same key replaces the earlier one.
+        """
+        path = os.path.realpath(str(path))
+        if path not in self._growing:
+            callback(True)
+            return
+        self._done.setdefault(path, {})[key] = callback
+
+    def ffmpeg_parameters(self, path) -> str:
+        """Input options that make ffmpeg wait at EOF while `path` is still growing."""
+        if not self.is_growing(path):
+            return ""
+        return f"-follow 1 -rw_timeout {self.stall_timeout * 1000000}"
+
+    def recover(self) -> None:
+        """Remove files left half-written by a previous run."""
+        try:
+            with open(self.LEDGER_PATH, "r", encoding="utf-8") as f:
+                stale = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            LOGGER(__name__).warning("Progressive ledger is unreadable: %s", e)
+            stale = []
+        for path in stale:
+            try:
+                os.remove(path)
+                LOGGER(__name__).info("Removed partial download %s", path)
+            except OSError:
+                pass
+        self._save()
+
+    def begin(self, path) -> str:
+        """Mark `path` as being written; returns its normalised form."""
+        path = os.path.realpath(str(path))
+        if path not in self._growing:
+            self._growing.add(path)
+            self._save()
+        return path
+
+    def end(self, path, ok: bool) -> None:
+        """Mark `path` as complete, or delete it when the download failed."""
+        path = os.path.realpath(str(path))
+        self._growing.discard(path)
+        if not ok:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._save()
+        for callback in self._done.pop(path, {}).values():
+            try:
+                callback(ok)
+            except Exception as e:
+                LOGGER(__name__).warning("Progressive completion callback failed: %s", e)
+
+    def playable(self, path, written: int) -> Optional[bool]:
+        """Whether enough of `path` is on disk to start playback; False if it never will be."""
+        if written < self.buffer:
+            return None
+        return streamable(str(path))
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.LEDGER_PATH), exist_ok=True)
+            with open(self.LEDGER_PATH, "w", encoding="utf-8") as f:
+                json.dump(sorted(self._growing), f)
+        except OSError as e:
+            LOGGER(__name__).warning("Failed to save progressive ledger: %s", e)
+
+    def _feed(self, growing: _Growing, current: int, total: int, path: Optional[str]) -> None:
+        if not path:
+            return
+        path = self.begin(path)
+        growing.paths.add(path)
+        if growing.ready.is_set() or growing.fallback:
+            return
+        if total and current >= total:
+            return
+        # Re-read the header only after another buffer's worth has arrived
+        if growing.checked and current - growing.checked < self.buffer:
+            return
+        result = self.playable(path, current)
+        if current >= self.buffer:
+            growing.checked = current
+        if result is None:
+            return
+        if result is False:
+            LOGGER(__name__).info("%s is not streamable, waiting for full download", path)
+            growing.fallback = True
+            return
+        growing.path = path
+        growing.ready.set()
+
+    def _finish(self, key: Hashable, growing: _Growing, result: Any) -> None:
+        final = os.path.realpath(str(result)) if result else None
+        for path in growing.paths:
+            self.end(path, path == final)
+        if self._pending.get(key) is growing:
+            self._pending.pop(key, None)
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[Callable[..., None]], Awaitable[Any]],
+        mystic=None,
+        token=None,
+    ) -> Any:
+        """
+        Run `factory(progress)` through the download single-flight map and
+        return either its result or, as soon as enough is buffered, the path
+        of the file it is still writing.
+        """
+        from AnonXMusic.platforms._flight import flights
+
+        if not self.enabled:
+            return await flights.run(key, factory, mystic, token)
+
+        growing = self._pending.get(key)
+        if growing is None:
+            growing = self._pending[key] = _Growing()
+
+        async def tracked(progress):
+            def feed(current, total, path=None):
+                progress(current, total)
+                self._feed(growing, current, total, path)
+
+            result = None
+            try:
+                result = await factory(feed)
+                return result
+            finally:
+                self._finish(key, growing, result)
+
+        download = asyncio.ensure_future(flights.run(key, tracked, mystic, token))
+        ready = asyncio.ensure_future(growing.ready.wait())
+        try:
+            await asyncio.wait({download, ready}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            download.cancel()
+            ready.cancel()
+            raise
+        if download.done():
+            ready.cancel()
+            return download.result()
+        # Keep the download going; surface late failures in the log only
+        download.add_done_callback(self._log_failure)
+        LOGGER(__name__).info("Starting playback of %s while it downloads", growing.path)
+        return growing.path
+
+    @staticmethod
+    def _log_failure(task: asyncio.Future) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            LOGGER(__name__).warning("Progressive download failed: %s", task.exception())
+
+
+progressive = ProgressiveFiles()
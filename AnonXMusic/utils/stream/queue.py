@@ -1,9 +1,16 @@
 import asyncio
+import re
 from typing import Union
 
 from AnonXMusic.misc import db
+from AnonXMusic.utils.database import record_particular_play
 from AnonXMusic.utils.formatters import check_duration, seconds_to_min
-from config import autoclean, time_to_seconds
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.cancel import CancelToken
+from AnonXMusic.utils.stream.lazy import lazy_queue
+from config import DURATION_LIMIT, time_to_seconds
+
+YOUTUBE_ID = re.compile(r"[\w-]{11}")
 
 
 async def put_queue(
@@ -18,9 +25,12 @@ async def put_queue(
     stream,
     forceplay: Union[bool, str] = None,
     apple_metadata: Union[dict, None] = None,
+    token: Union[CancelToken, None] = None,
+    lazy: Union[dict, None] = None,
 ):
     """
-    Enhanced queue function that ensures 'seconds' field is always present
+    Enhanced queue function that ensures 'seconds' field is always present.
+    `lazy` queues an unresolved reference that is matched near the head.
     """
     # Calculate duration in seconds
     try:
@@ -50,18 +60,52 @@ async def put_queue(
         "vidid": vidid,
         "streamtype": stream,
         "played": 0,
+        # Cancels this entry's downloads when it is skipped or the queue is cleared
+        "token": token or CancelToken(),
     }
+    put["token"].attach()
 
     # Add Apple Music metadata if provided
     if apple_metadata:
         put["apple_metadata"] = apple_metadata
+    if lazy:
+        put["lazy"] = lazy
 
+    content_cache.acquire(file)
+    if isinstance(vidid, str) and YOUTUBE_ID.fullmatch(vidid):
+        # Feeds chat/global top tracks and the idle cache warmer
+        asyncio.create_task(record_particular_play(chat_id, vidid, title))
     if not db.get(chat_id):
         db[chat_id] = []
     if forceplay:
         db[chat_id].insert(0, put)
     else:
         db[chat_id].append(put)
+    lazy_queue.prefetch(chat_id)
+
+
+async def put_reference(chat_id, original_chat_id, search, user, user_id, video=None):
+    """
+    Queue an unresolved playlist track (see `_matches.unresolved`).
+    Returns its title, or None when it is over the duration limit.
+    """
+    ref = search["lazy"]
+    if ref["duration"] > DURATION_LIMIT:
+        return None
+    title = search.get("apple_title") or search["title"]
+    await put_queue(
+        chat_id,
+        original_chat_id,
+        f"lazy_{ref['provider']}",
+        title,
+        search["duration_min"] or "Unknown",
+        user,
+        None,
+        user_id,
+        "video" if video else "audio",
+        lazy=ref,
+    )
+    return title
 
 
 async def put_queue_index(
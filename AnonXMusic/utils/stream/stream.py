@@ -6,13 +6,34 @@ import config
 from AnonXMusic import Carbon, YouTube, app
 from AnonXMusic.core.call import Anony
 from AnonXMusic.misc import db
+from AnonXMusic.platforms._ytdlp import AdmissionError
 from AnonXMusic.utils.database import add_active_video_chat, is_active_chat
 from AnonXMusic.utils.exceptions import AssistantErr
 from AnonXMusic.utils.inline import stream_markup, close_markup
 from AnonXMusic.utils.pastebin import AnonyBin
-from AnonXMusic.utils.stream.queue import put_queue, put_queue_index
+from AnonXMusic.utils.stream.cancel import CancelToken
+from AnonXMusic.utils.stream.feed import playlist_feeds
+from AnonXMusic.utils.stream.lazy import lazy_queue
+from AnonXMusic.utils.stream.queue import put_queue, put_queue_index, put_reference
 from AnonXMusic.utils.thumbnails import get_thumb
 
+
+async def tracks(result):
+    """Iterate playlist items, waiting on ones that are still being resolved."""
+    if hasattr(result, "__aiter__"):
+        async for item in result:
+            yield item
+    else:
+        for item in result:
+            yield item
+
+
+def rejected(_, error: AdmissionError) -> str:
+    if error.kind == "duration":
+        return _["play_6"].format(config.DURATION_LIMIT_MIN, app.mention)
+    return _["play_8"] if error.kind == "video" else _["play_5"]
+
+
 async def stream(
     _,
     mystic,
@@ -35,10 +56,27 @@ async def stream(
     if streamtype == "playlist":
         msg = f"{_['play_19']}\n\n"
         count = 0
-        for search in result:
+        async for search in tracks(result):
             if int(count) == config.PLAYLIST_FETCH_LIMIT:
+                break
+            ref = search.get("lazy") if isinstance(search, dict) else None
+            if ref and await is_active_chat(chat_id):
+                # Queued as a reference; matched once it nears the head of the queue
+                title = await put_reference(
+                    chat_id, original_chat_id, search, user_name, user_id, video
+                )
+                if title is None:
+                    continue
+                position = len(db.get(chat_id)) - 1
+                count += 1
+                msg += f"{count}. {title[:70]}\n"
+                msg += f"{_['play_20']} {position}\n\n"
                 continue
             try:
+                if ref:
+                    search = await lazy_queue.lookup(ref)
+                    if not search:
+                        continue
                 # NEW: Enhanced Apple Music playlist items handling from current version
                 if isinstance(search, dict) and "vidid" in search:
                     # Apple Music or other pre-processed items
@@ -90,11 +128,16 @@ async def stream(
                 if not forceplay:
                     db[chat_id] = []
                 status = True if video else None
+                token = CancelToken(chat_id)
                 try:
                     file_path, direct = await YouTube.download(
-                        vidid, mystic, video=status, videoid=True
+                        vidid, mystic, video=status, videoid=True, token=token
                     )
+                except AdmissionError as e:
+                    token.attach()
+                    raise AssistantErr(rejected(_, e))
                 except:
+                    token.attach()
                     raise AssistantErr(_["play_14"])
                 await Anony.join_call(
                     chat_id,
@@ -114,6 +157,7 @@ async def stream(
                     user_id,
                     "video" if video else "audio",
                     forceplay=forceplay,
+                    token=token,
                 )
                 img = await get_thumb(vidid)
                 button = stream_markup(_, chat_id)
@@ -134,6 +178,15 @@ async def stream(
         if count == 0:
             return
         else:
+            # Longer YouTube playlists keep queueing pages as the queue drains
+            playlist_feeds.attach(
+                chat_id,
+                getattr(result, "cursor", None),
+                original_chat_id,
+                user_name,
+                user_id,
+                video,
+            )
             link = await AnonyBin(msg)
             lines = msg.count("\n")
             if lines >= 17:
@@ -167,11 +220,16 @@ async def stream(
         # NEW: Enhanced thumbnail selection for Apple Music
         thumbnail = result.get("apple_artwork") or result["thumb"]
         status = True if video else None
+        token = CancelToken(chat_id)
         try:
             file_path, direct = await YouTube.download(
-                vidid, mystic, videoid=True, video=status
+                vidid, mystic, videoid=True, video=status, token=token
             )
+        except AdmissionError as e:
+            token.attach()
+            raise AssistantErr(rejected(_, e))
         except:
+            token.attach()
             raise AssistantErr(_["play_14"])
         if await is_active_chat(chat_id):
             await put_queue(
@@ -184,6 +242,7 @@ async def stream(
                 vidid,
                 user_id,
                 "video" if video else "audio",
+                token=token,
             )
             position = len(db.get(chat_id)) - 1
             await app.send_message(
@@ -211,6 +270,7 @@ async def stream(
                 user_id,
                 "video" if video else "audio",
                 forceplay=forceplay,
+                token=token,
             )
             img = await get_thumb(vidid)
             button = stream_markup(_, chat_id)
@@ -376,13 +436,30 @@ async def stream(
             n, file_path = await YouTube.video(link)
             if n == 0:
                 raise AssistantErr(_["str_3"])
-            await Anony.join_call(
-                chat_id,
-                original_chat_id,
-                file_path,
-                video=status,
-                image=thumbnail if thumbnail else None,
-            )
+            try:
+                await Anony.join_call(
+                    chat_id,
+                    original_chat_id,
+                    file_path,
+                    video=status,
+                    image=thumbnail if thumbnail else None,
+                )
+            except AssistantErr:
+                raise
+            except Exception:
+                if n != 1:
+                    raise
+                # A cached stream URL can be revoked before its expiry; retry with a fresh one
+                n, file_path = await YouTube.video(link, fresh=True)
+                if n == 0:
+                    raise AssistantErr(_["str_3"])
+                await Anony.join_call(
+                    chat_id,
+                    original_chat_id,
+                    file_path,
+                    video=status,
+                    image=thumbnail if thumbnail else None,
+                )
             await put_queue(
                 chat_id,
                 original_chat_id,
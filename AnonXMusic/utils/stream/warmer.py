@@ -0,0 +1,138 @@
+import asyncio
+import glob
+import os
+import time
+
+from AnonXMusic.logging import LOGGER
+from AnonXMusic.utils.database import get_active_chats, get_global_tops, get_particulars
+from AnonXMusic.utils.stream.cache import content_cache
+from AnonXMusic.utils.stream.cancel import CancelToken
+from config import (
+    DOWNLOADS_DIR,
+    WARM_BANDWIDTH,
+    WARM_DISK_SHARE,
+    WARM_INTERVAL,
+    WARM_TOP_N,
+)
+
+
+class CacheWarmer:
+    """
+    Pre-downloads the most played tracks while the bot is idle. Tracks are
+    ranked by play count decayed by time since the last play, globally and
+    (weighted higher) for chats that are currently in a call. Each run stops
+    at the bandwidth budget, when the content cache nears its disk budget,
+    or as soon as a playback download is in flight, which also cancels the
+    track being warmed.
+    """
+
+    HALF_LIFE = 3 * 86400
+    ACTIVE_WEIGHT = 2
+    PAUSE = 5
+
+    def __init__(
+        self,
+        top_n: int = WARM_TOP_N,
+        interval: int = WARM_INTERVAL,
+        bandwidth: int = WARM_BANDWIDTH,
+        disk_share: float = WARM_DISK_SHARE,
+    ) -> None:
+        self.top_n = top_n
+        self.interval = interval
+        self.bandwidth = bandwidth
+        self.disk_share = disk_share
+        self._warm: dict[str, str] = {}
+
+    def _score(self, track: dict, now: float) -> float:
+        age = now - track.get("last", 0) if track.get("last") else self.HALF_LIFE * 2
+        return track.get("spot", 0) * 0.5 ** (age / self.HALF_LIFE)
+
+    async def rank(self) -> list[str]:
+        now = time.time()
+        scores: dict[str, float] = {}
+        for vidid, track in (await get_global_tops()).items():
+            scores[vidid] = self._score(track, now)
+        for chat_id in list(await get_active_chats()):
+            for vidid, track in (await get_particulars(chat_id)).items():
+                scores[vidid] = scores.get(vidid, 0) + self.ACTIVE_WEIGHT * self._score(track, now)
+        return sorted(scores, key=scores.get, reverse=True)[: self.top_n]
+
+    def _on_disk(self, vidid: str) -> bool:
+        path = self._warm.get(vidid)
+        if path and os.path.isfile(path):
+            return True
+        return any(
+            not name.endswith((".part", ".json"))
+            for name in glob.glob(os.path.join(DOWNLOADS_DIR, f"{vidid}.*"))
+        )
+
+    @staticmethod
+    def _playback(key) -> bool:
+        # Warm downloads run under keys ending in "warm"
+        return not (isinstance(key, tuple) and key[-1] == "warm")
+
+    def _busy(self) -> bool:
+        from AnonXMusic.platforms._flight import flights
+
+        return any(self._playback(key) for key in flights.keys())
+
+    def _disk_full(self) -> bool:
+        return content_cache.usage >= content_cache.budget * self.disk_share
+
+    async def _fetch(self, vidid: str):
+        """Download one track to completion, cancelled as soon as a playback download starts."""
+        from AnonXMusic import YouTube
+        from AnonXMusic.platforms._flight import flights
+
+        token = CancelToken()
+        unwatch = flights.watch(lambda key: self._playback(key) and token.cancel())
+        try:
+            path, _ = await YouTube.download(vidid, None, videoid=True, token=token, warm=True)
+        finally:
+            unwatch()
+            token.cancel()
+        return path
+
+    async def warm(self) -> int:
+        from AnonXMusic.platforms._flight import DownloadCancelled
+
+        spent = 0
+        warmed = 0
+        for vidid in await self.rank():
+            if spent >= self.bandwidth or self._disk_full() or self._busy():
+                break
+            if self._on_disk(vidid):
+                continue
+            try:
+                path = await self._fetch(vidid)
+            except DownloadCancelled:
+                LOGGER(__name__).info("Stopped warming %s for a playback download", vidid)
+                break
+            except Exception as e:
+                LOGGER(__name__).info("Warming %s failed: %s", vidid, e)
+                continue
+            if not path or not os.path.isfile(path):
+                continue
+            size = os.path.getsize(path)
+            self._warm[vidid] = path
+            spent += size
+            content_cache.usage += size
+            warmed += 1
+            await asyncio.sleep(self.PAUSE)
+        if warmed:
+            LOGGER(__name__).info(
+                "Warmed %d top tracks (%.1f MiB)", warmed, spent / 1048576
+            )
+        return warmed
+
+    async def run(self):
+        while not await asyncio.sleep(self.interval):
+            if self._busy():
+                continue
+            try:
+                await self.warm()
+            except Exception as e:
+                LOGGER(__name__).warning("Cache warming failed: %s", e)
+
+
+cache_warmer = CacheWarmer()
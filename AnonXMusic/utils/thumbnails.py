@@ -1,12 +1,12 @@
 import os
 import re
 import random
-import aiohttp
 import aiofiles
 import traceback
 
 from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont, ImageOps
 from youtubesearchpython.__future__ import VideosSearch
+from AnonXMusic.core.session import session_pool
 from config import YOUTUBE_IMG_URL  # fallback image URL
 
 
@@ -72,22 +72,22 @@ async def get_thumb(videoid: str):
             views = result.get("viewCount", {}).get("short", "Unknown Views")
             channel = result.get("channel", {}).get("name", "Unknown Channel")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(thumbnail) as resp:
-                if resp.status == 200:
-                    f = await aiofiles.open(f"cache/thumb{videoid}.png", mode="wb")
-                    await f.write(await resp.read())
-                    await f.close()
+        session = session_pool.get()
+        async with session.get(thumbnail) as resp:
+            if resp.status == 200:
+                f = await aiofiles.open(f"cache/thumb{videoid}.png", mode="wb")
+                await f.write(await resp.read())
+                await f.close()
 
         youtube = Image.open(f"cache/thumb{videoid}.png")
     except Exception:
         # fallback to default image if anything fails
-        async with aiohttp.ClientSession() as session:
-            async with session.get(YOUTUBE_IMG_URL) as resp:
-                if resp.status == 200:
-                    f = await aiofiles.open(f"cache/thumb{videoid}.png", mode="wb")
-                    await f.write(await resp.read())
-                    await f.close()
+        session = session_pool.get()
+        async with session.get(YOUTUBE_IMG_URL) as resp:
+            if resp.status == 200:
+                f = await aiofiles.open(f"cache/thumb{videoid}.png", mode="wb")
+                await f.write(await resp.read())
+                await f.close()
         youtube = Image.open(f"cache/thumb{videoid}.png")
 
     try:
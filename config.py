@@ -62,6 +62,62 @@ SPOTIFY_CLIENT_SECRET = getenv("SPOTIFY_CLIENT_SECRET", "4b03167b38c943c3857333b
 # Maximum limit for fetching playlist's track from youtube, spotify, apple links.
 PLAYLIST_FETCH_LIMIT = int(getenv("PLAYLIST_FETCH_LIMIT", 25))
 
+# Playlist tracks are matched to YouTube only once they are this many positions from the head of the queue
+QUEUE_LOOKAHEAD = int(getenv("QUEUE_LOOKAHEAD", 2))
+
+# Long YouTube playlists queue their next page once fewer than this many tracks are left
+PLAYLIST_REFILL_AT = int(getenv("PLAYLIST_REFILL_AT", 5))
+
+
+# Number of long-lived yt-dlp worker processes and their per-request timeouts (in seconds)
+YTDLP_WORKERS = int(getenv("YTDLP_WORKERS", 2))
+YTDLP_TIMEOUT = int(getenv("YTDLP_TIMEOUT", 60))
+YTDLP_DOWNLOAD_TIMEOUT = int(getenv("YTDLP_DOWNLOAD_TIMEOUT", 600))
+
+# Resolved stream URLs are reused until this many seconds before their expiry,
+# or for STREAM_URL_TTL seconds when the URL carries no expiry
+STREAM_URL_MARGIN = int(getenv("STREAM_URL_MARGIN", 300))
+STREAM_URL_TTL = int(getenv("STREAM_URL_TTL", 1800))
+
+
+# Disk budget (in bytes) for downloads/, cache/ and playback/ and the eviction policy (lru or lfu)
+CACHE_SIZE_LIMIT = int(getenv("CACHE_SIZE_LIMIT", 5368709120))
+CACHE_POLICY = getenv("CACHE_POLICY", "lru")
+
+
+# Connection pooling for the shared HTTP clients (download API and its CDN)
+HTTP_MAX_CONNECTIONS_PER_HOST = int(getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 10))
+HTTP_KEEPALIVE_EXPIRY = int(getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+# Parallel range requests per file when the CDN supports them
+DOWNLOAD_CONNECTIONS = int(getenv("DOWNLOAD_CONNECTIONS", 4))
+
+# Start playing audio once this many bytes are downloaded; ffmpeg gives up after the stall timeout
+PROGRESSIVE_PLAYBACK = getenv("PROGRESSIVE_PLAYBACK", "True").lower() == "true"
+PROGRESSIVE_BUFFER = int(getenv("PROGRESSIVE_BUFFER", 524288))
+PROGRESSIVE_STALL_TIMEOUT = int(getenv("PROGRESSIVE_STALL_TIMEOUT", 5))
+
+# Start the fallback download source after this many seconds until latency stats exist
+SOURCE_HEDGE_DELAY = int(getenv("SOURCE_HEDGE_DELAY", 8))
+SOURCE_CIRCUIT_COOLDOWN = int(getenv("SOURCE_CIRCUIT_COOLDOWN", 60))
+
+# Upload a track to SONG_DUMP_ID once it has been downloaded this many times
+MIRROR_MIN_PLAYS = int(getenv("MIRROR_MIN_PLAYS", 2))
+
+# Concurrent Telegram uploads/downloads of the bot, shared by playback > interactive > bulk
+TRANSFER_SLOTS = int(getenv("TRANSFER_SLOTS", 7))
+
+# Pre-download the most played tracks while idle, within a per-run download and disk budget
+WARM_TOP_N = int(getenv("WARM_TOP_N", 10))
+WARM_INTERVAL = int(getenv("WARM_INTERVAL", 900))
+WARM_BANDWIDTH = int(getenv("WARM_BANDWIDTH", 262144000))
+WARM_DISK_SHARE = float(getenv("WARM_DISK_SHARE", 0.8))
+
+# Source quality to download: economy (64k / 360p), standard (128k / 480p) or high (160k / 720p)
+QUALITY_PROFILE = getenv("QUALITY_PROFILE", "standard").lower()
+
+# Number of resolved tracks kept in the local search index that answers repeated /play queries
+SEARCH_INDEX_SIZE = int(getenv("SEARCH_INDEX_SIZE", 20000))
+
 
 # Telegram audio and video file size limit (in bytes)
 TG_AUDIO_FILESIZE_LIMIT = int(getenv("TG_AUDIO_FILESIZE_LIMIT", 104857600))
@@ -81,7 +137,6 @@ BANNED_USERS = filters.user()
 adminlist = {}
 lyrical = {}
 votemode = {}
-autoclean = []
 confirmer = {}
 
 API_URL = getenv("API_URL")
@@ -0,0 +1,281 @@
+"""
+The yt-dlp side of AnonXMusic.platforms._ytdlp: the worker loop and the
+format selection it runs. It is a top-level module that imports nothing from
+the bot, so worker processes can be started from a clean forkserver without
+re-importing (and re-initialising) the AnonXMusic package.
+"""
+
+import json
+import os
+import signal
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import yt_dlp
+
+# Warm instances kept per worker; per-call options (output template, format,
+# cookie file) make new keys, so the least recently used ones are closed
+MAX_INSTANCES = 8
+
+
+class YtDlpError(Exception):
+    pass
+
+
+class AdmissionError(YtDlpError):
+    """
+    The track breaks a duration or size limit; raised before anything is
+    downloaded. `kind` is "duration", "audio" or "video".
+    """
+
+    # Another source would hit the same limit, so don't fall back to one
+    fatal = True
+
+    def __init__(self, kind: str, message: str) -> None:
+        super().__init__(message)
+        self.kind = kind
+
+
+Progress = Callable[..., None]
+
+
+# Files already announced to the parent during the current request
+_announced: set[str] = set()
+
+
+def _progress_hook(conn) -> Callable[[dict], None]:
+    """
+    Announce every file a download starts writing, by its final and its
+    temporary name, and forward (downloaded, total, filename) to the parent
+    at most once a second.
+    """
+    last = [0.0]
+
+    def hook(d: dict) -> None:
+        if d.get("status") != "downloading":
+            return
+        for path in (d.get("filename"), d.get("tmpfilename")):
+            if path and path not in _announced:
+                _announced.add(path)
+                conn.send(("writing", path))
+        now = time.monotonic()
+        if now - last[0] < 1:
+            return
+        last[0] = now
+        total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+        conn.send(
+            ("progress", (d.get("downloaded_bytes") or 0, int(total), d.get("filename")))
+        )
+
+    return hook
+
+
+# Minimum source quality per profile; pytgcalls re-encodes anyway, so more is wasted bandwidth
+PROFILES = {
+    "economy": {"abr": 64, "height": 360},
+    "standard": {"abr": 128, "height": 480},
+    "high": {"abr": 160, "height": 720},
+}
+
+
+def _size(f: dict) -> int:
+    return int(f.get("filesize") or f.get("filesize_approx") or 0)
+
+
+def _fits(f: dict, budget: int) -> bool:
+    # Formats of unknown size are let through; yt-dlp reports most sizes up front
+    return not budget or _size(f) <= budget
+
+
+def _pick_audio(
+    formats: list, abr: int, ext: Optional[str] = None, budget: int = 0
+) -> Optional[dict]:
+    """Smallest audio-only format with at least `abr` kbps, else the richest one (Opus on ties)."""
+    audios = [
+        f
+        for f in formats
+        if f.get("vcodec") == "none"
+        and f.get("acodec") not in (None, "none")
+        and (ext is None or f.get("ext") == ext)
+        and _fits(f, budget)
+    ]
+    if not audios:
+        return None
+    rate = lambda f: f.get("abr") or f.get("tbr") or 0
+    opus = lambda f: 0 if "opus" in (f.get("acodec") or "") else 1
+    enough = [f for f in audios if rate(f) >= abr]
+    if enough:
+        return min(enough, key=lambda f: (_size(f) or rate(f) * 1000, opus(f)))
+    return max(audios, key=lambda f: (rate(f), -opus(f)))
+
+
+def _pick_video(formats: list, height: int, budget: int = 0) -> Optional[dict]:
+    """Smallest mp4 video-only format at least `height` tall, else the tallest one."""
+    videos = [
+        f
+        for f in formats
+        if f.get("acodec") == "none"
+        and f.get("vcodec") not in (None, "none")
+        and f.get("ext") == "mp4"
+        and f.get("height")
+        and _fits(f, budget)
+    ]
+    if not videos:
+        return None
+    enough = [f for f in videos if f["height"] >= height]
+    if enough:
+        return min(enough, key=lambda f: (f["height"], _size(f) or f.get("tbr") or 0))
+    return max(videos, key=lambda f: (f["height"], -(_size(f) or 0)))
+
+
+def _profile_selector(select: dict) -> Callable[[dict], Any]:
+    """
+    yt-dlp format selector choosing from the formats of the extraction being
+    processed. Formats above `max_filesize` are skipped, so a track is
+    downgraded to fit, or rejected with AdmissionError when nothing does.
+    """
+    profile = PROFILES.get(select.get("profile"), PROFILES["standard"])
+    budget = select.get("max_filesize") or 0
+
+    def selector(ctx: dict):
+        formats = ctx["formats"]
+        if select.get("video"):
+            audio = _pick_audio(formats, profile["abr"], "m4a", budget)
+            video = audio and _pick_video(
+                formats, profile["height"], max(1, budget - _size(audio)) if budget else 0
+            )
+            if video and audio:
+                yield {
+                    "format_id": f"{video['format_id']}+{audio['format_id']}",
+                    "ext": "mp4",
+                    "requested_formats": [video, audio],
+                    "protocol": f"{video['protocol']}+{audio['protocol']}",
+                }
+                return
+            merged = [f for f in formats if "none" not in (f.get("acodec"), f.get("vcodec"))]
+        else:
+            audio = _pick_audio(formats, profile["abr"], budget=budget)
+            if audio:
+                yield audio
+                return
+            merged = [f for f in formats if f.get("acodec") != "none"]
+        # Nothing split into audio/video streams: fall back to the best complete format
+        merged = [f for f in merged if _fits(f, budget)]
+        if merged:
+            yield merged[-1]
+        elif budget and formats:
+            kind = "video" if select.get("video") else "audio"
+            raise AdmissionError(kind, f"No {kind} format fits in {budget} bytes")
+
+    return selector
+
+
+def _instance(instances: OrderedDict, opts: dict, conn) -> yt_dlp.YoutubeDL:
+    """Return a warm YoutubeDL for these options, creating it on first use."""
+    key = json.dumps(opts, sort_keys=True, default=str)
+    ydl = instances.get(key)
+    if ydl is not None:
+        instances.move_to_end(key)
+    else:
+        params = dict(opts)
+        if params.pop("report_progress", False):
+            params["progress_hooks"] = [_progress_hook(conn)]
+        select = params.pop("select", None)
+        if select:
+            params["format"] = _profile_selector(select)
+        ydl = yt_dlp.YoutubeDL(params)
+        instances[key] = ydl
+        while len(instances) > MAX_INSTANCES:
+            _, oldest = instances.popitem(last=False)
+            try:
+                oldest.close()
+            except Exception:
+                pass
+    return ydl
+
+
+def _admit(info: dict, select: dict) -> None:
+    """Reject live streams and overlong tracks from the unprocessed extraction."""
+    limit = select.get("max_duration")
+    if not limit:
+        return
+    if info.get("is_live") or info.get("live_status") in ("is_live", "is_upcoming"):
+        raise AdmissionError("duration", "Live streams can't be downloaded")
+    duration = info.get("duration") or 0
+    if duration > limit:
+        raise AdmissionError("duration", f"Track is {int(duration)}s long, limit is {limit}s")
+
+
+def _handle(instances: OrderedDict, op: str, url: str, opts: dict, conn) -> Any:
+    # Playlist pages differ per call; keep the range out of the instance key
+    opts = dict(opts)
+    items = opts.pop("playlist_items", None)
+    ydl = _instance(instances, opts, conn)
+    if op == "extract":
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+    if op == "download":
+        _announced.clear()
+        info = ydl.extract_info(url, download=False, process=False)
+        _admit(info, opts.get("select") or {})
+        info = ydl.process_ie_result(info, download=True)
+        downloads = info.get("requested_downloads") or []
+        result = ydl.sanitize_info(info)
+        result["filepath"] = (
+            downloads[0].get("filepath") if downloads else ydl.prepare_filename(info)
+        )
+        if opts.get("select"):
+            result["selected"] = {
+                "profile": opts["select"].get("profile"),
+                "format_id": info.get("format_id"),
+                "abr": info.get("abr"),
+                "height": info.get("height"),
+                "filesize": _size(info)
+                or sum(_size(f) for f in info.get("requested_formats") or []),
+            }
+        return result
+    if op == "urls":
+        info = ydl.extract_info(url, download=False)
+        formats = info.get("requested_formats") or [info]
+        return [f["url"] for f in formats if f.get("url")]
+    if op == "flat":
+        ydl.params["playlist_items"] = items
+        try:
+            info = ydl.extract_info(url, download=False)
+        finally:
+            ydl.params.pop("playlist_items", None)
+        return [
+            {"id": e["id"], "title": e.get("title"), "duration": int(e.get("duration") or 0)}
+            for e in info.get("entries") or []
+            if e and e.get("id")
+        ]
+    raise ValueError(f"Unknown operation: {op}")
+
+
+def worker_main(conn) -> None:
+    """
+    Worker loop: receive (op, url, opts, generation), reply with any number of
+    ("progress", ...) messages followed by one ("ok" | "rejected" | "error", payload).
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Own process group so ffmpeg children die with the worker
+    os.setpgrp()
+    instances = OrderedDict()
+    generation = 0
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        op, url, opts, gen = request
+        if gen != generation:
+            instances.clear()
+            generation = gen
+        try:
+            conn.send(("ok", _handle(instances, op, url, opts, conn)))
+        except AdmissionError as e:
+            conn.send(("rejected", (e.kind, str(e))))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))